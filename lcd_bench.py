@@ -0,0 +1,385 @@
+"""Benchmarks of the rendering and navigation hot paths.
+
+Run:
+    python lcd_bench.py                     # compare with lcd_bench_baseline.json
+    python lcd_bench.py --save              # record a new baseline
+    python lcd_bench.py --sizes 10 100      # smaller run
+
+Exits with status 1 when a benchmark is slower than its baseline by more
+than the tolerance. Each benchmark is timed along with a fixed reference
+workload, run in turn with it, and compared with the baseline by its
+median time relative to that reference. A baseline recorded on a faster
+or slower machine, or while the machine was busier, still applies.
+Benchmarks over the tolerance are timed again, and only count as
+regressions if they stay over it. Commits changing a measured path
+record a new baseline along with the change.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import lcd_menu
+from lcd_menu import HORIZONTAL, VERTICAL, ItemProvider, ItemsMenu, PushButton
+
+
+SIZES = [10, 100, 1000, 10000]
+# Items of the lazily provided menu
+PROVIDER_SIZE = 100000
+DISPLAY_SIZE = [20, 4]
+# Bytes per item of a built, laid out and rendered virtual menu
+MEMORY_TARGET = 1280
+# Slowdowns smaller than this are timer noise, in seconds
+MIN_DELTA = 1e-6
+# Allowed slowdown, relative to the baseline
+TOLERANCE = 0.3
+# Times a benchmark over the tolerance is timed again
+RETRIES = 2
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lcd_bench_baseline.json')
+
+
+def build_menu(count, orient, loop, kind):
+    """Menu of count buttons shown on a DISPLAY_SIZE screen
+
+    Parameters:
+        count (int): Number of items
+        orient (int): HORIZONTAL or VERTICAL
+        loop (bool): True if menu is looping
+        kind (str): 'line' for one line items without divider,
+            'multi' for two line items separated by dividers
+
+    Returns:
+        ItemsMenu:
+    """
+
+    if kind == 'multi':
+        items = [PushButton('Item {0}\nline {0}'.format(i)) for i in range(count)]
+        div = '|' if orient == HORIZONTAL else '-'
+        loop_div = '#'
+    else:
+        items = [PushButton('Item {0}'.format(i)) for i in range(count)]
+        div = ''
+        loop_div = ''
+    return ItemsMenu(items, size=list(DISPLAY_SIZE), auto_size=False,
+                     orient=orient, loop=loop, div=div, loop_div=loop_div)
+
+
+def invalidate_tree(menu):
+    for item in menu.items:
+        item.invalidate()
+    menu.invalidate()
+
+
+def reference_work():
+    """Fixed string and list work, like rendering, timed along with each
+    benchmark to scale it to the speed of the machine at that time"""
+
+    rows = [list('Item {0:<15}'.format(i)) for i in range(50)]
+    lines = [''.join(row) for row in rows]
+    text = '\n'.join(lines)
+    return sorted(text.split('\n'), key=len)
+
+
+def measure(fct, setup=None, min_repeat=5, min_time=0.1):
+    """Time of fct and its peak allocation. reference_work is run after
+    each run of fct, in the same conditions, and each run is timed
+    relative to it. Garbage collection is held off while timing, like
+    timeit.
+
+    Parameters:
+        fct (function): Code to time
+        setup (function): Called before each run, not timed
+        min_repeat (int): Minimum number of runs
+        min_time (float): Keep running until this much time was measured
+
+    Returns:
+        list: [best seconds, peak allocated bytes,
+               median of the times relative to reference_work]
+    """
+
+    best = None
+    relative = []
+    total = 0.0
+    runs = 0
+    collecting = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            while runs < min_repeat or total < min_time:
+                if setup:
+                    setup()
+                start = time.perf_counter()
+                fct()
+                middle = time.perf_counter()
+                reference_work()
+                end = time.perf_counter()
+                total += end - start
+                runs += 1
+                best = middle - start if best is None else min(best, middle - start)
+                relative.append((middle - start) / (end - middle))
+    finally:
+        if collecting:
+            gc.enable()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if setup:
+            setup()
+        tracemalloc.start()
+        fct()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return [best, peak, statistics.median(relative)]
+
+
+def bench_menu(menu):
+    """
+    Returns:
+        dict: name: [seconds, peak bytes, relative time]
+    """
+
+    size = menu.size
+    results = {}
+    results['render'] = measure(menu.frame, setup=lambda: invalidate_tree(menu))
+    results['frame_cached'] = measure(menu.frame, setup=menu.frame)
+    menu.virtual = True
+    results['render_virtual'] = measure(menu.frame, setup=lambda: invalidate_tree(menu))
+    menu.virtual = False
+    results['orient_items'] = measure(lambda: ItemsMenu._orient_items(
+        menu.items, size, menu.orient, menu.loop, menu.align, menu.div, menu.loop_div))
+    results['needs_loop'] = measure(lambda: ItemsMenu.needs_loop(
+        menu.items, size, menu.orient, menu.loop, menu.div))
+    results['update_offset'] = measure(menu.update_offset)
+    results['size'] = measure(lambda: menu.selected_item().size)
+
+    last = len(menu.items) - 1
+
+    def navigate():
+        if menu.index == last:
+            menu.first()
+        else:
+            menu.next()
+        menu.frame()
+    results['navigate'] = measure(navigate)
+    menu.virtual = True
+    results['navigate_virtual'] = measure(navigate)
+    menu.virtual = False
+
+    # Render moved to the end of the content
+    menu.last()
+    string = str(menu.frame())
+    results['string_align_move'] = measure(lambda: lcd_menu.string_align_move(
+        string, size, [3, 1], menu.align, menu.loop))
+    results['string_move'] = measure(lambda: lcd_menu.string_move(
+        string, size, [3, 1], menu.loop))
+    return results
+
+
+def bench_provider(count=PROVIDER_SIZE):
+    """Menu whose items are created on demand by an ItemProvider
+
+    Returns:
+        dict: name: [seconds, peak bytes, relative time]
+    """
+
+    def build():
+        provider = ItemProvider(count, lambda i: PushButton('Item {0}'.format(i)))
+        return ItemsMenu(provider, size=list(DISPLAY_SIZE), auto_size=False)
+
+    results = {}
+    results['open'] = measure(lambda: build().frame())
+    menu = build()
+
+    def navigate():
+        menu.next()
+        menu.frame()
+    results['navigate'] = measure(navigate)
+    return results
+
+
+def run(sizes, keys=None):
+    """
+    Parameters:
+        sizes (list): Item counts of the menus
+        keys (list): Only run the benchmarks of the menus of these
+            benchmark keys. Every menu if None
+
+    Returns:
+        dict: benchmark key: [seconds, peak bytes, relative time]
+    """
+
+    prefixes = None if keys is None else set(key.rsplit('/', 1)[0] for key in keys)
+    results = {}
+    for orient, orient_name in ((VERTICAL, 'vertical'), (HORIZONTAL, 'horizontal')):
+        for loop in (False, True):
+            for kind in ('line', 'multi'):
+                for count in sizes:
+                    prefix = '{0}/{1}/{2}/{3}'.format(
+                        orient_name, 'loop' if loop else 'noloop', kind, count)
+                    if prefixes is not None and prefix not in prefixes:
+                        continue
+                    menu = build_menu(count, orient, loop, kind)
+                    for name, result in bench_menu(menu).items():
+                        results['{0}/{1}'.format(prefix, name)] = result
+                    print('.', end='', file=sys.stderr, flush=True)
+    prefix = 'provider/{0}'.format(PROVIDER_SIZE)
+    if prefixes is None or prefix in prefixes:
+        for name, result in bench_provider().items():
+            results['{0}/{1}'.format(prefix, name)] = result
+    print(file=sys.stderr)
+    return results
+
+
+def bench_memory(count=10000):
+    """Memory held per item by a virtual menu once built, laid out and
+    rendered. The menu itself only holds the visible part of the content.
+
+    Returns:
+        dict: menu kind: bytes per item
+    """
+
+    results = {}
+    for kind in ('line', 'multi'):
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        menu = build_menu(count, VERTICAL, False, kind)
+        menu.virtual = True
+        menu.layout()
+        with contextlib.redirect_stdout(io.StringIO()):
+            menu.frame()
+        used = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+        results[kind] = used / float(count)
+        del menu
+    return results
+
+
+def slowdown(result, base):
+    """
+    Parameters:
+        result (list): [seconds, peak bytes, relative time], see measure
+        base (list): Baseline of the same benchmark
+
+    Returns:
+        list: [ratio to the baseline, seconds over the baseline]. None
+            if the baseline time is 0
+    """
+
+    seconds, _, relative = result
+    base_relative = base[2]
+    if base_relative <= 0:
+        return None
+    ratio = relative / base_relative
+    if ratio <= 0:
+        return [ratio, 0.0]
+    # Baseline time at the speed the machine had for this benchmark
+    return [ratio, seconds - seconds / ratio]
+
+
+def find_regressions(results, baseline, tolerance=TOLERANCE):
+    """
+    Returns:
+        list: keys slower than baseline by more than tolerance
+    """
+
+    regressions = []
+    for key, result in sorted(results.items()):
+        if baseline and key in baseline:
+            slower = slowdown(result, baseline[key])
+            if slower is not None and slower[0] > 1 + tolerance and slower[1] > MIN_DELTA:
+                regressions.append(key)
+    return regressions
+
+
+def retry(sizes, results, baseline, tolerance=TOLERANCE, retries=RETRIES):
+    """Time the benchmarks over the tolerance again, keeping their fastest
+    result relative to the baseline
+
+    Returns:
+        list: keys still slower than baseline
+    """
+
+    regressions = find_regressions(results, baseline, tolerance)
+    for _ in range(retries):
+        if not regressions:
+            break
+        again = run(sizes, regressions)
+        for key in regressions:
+            if slowdown(again[key], baseline[key])[0] < slowdown(results[key], baseline[key])[0]:
+                results[key] = again[key]
+        regressions = find_regressions(results, baseline, tolerance)
+    return regressions
+
+
+def report(results, baseline=None, regressions=()):
+    """Print results and their ratio to a baseline
+
+    Parameters:
+        results (dict): benchmark key: [seconds, peak bytes, relative time]
+        baseline (dict): Same layout as results
+        regressions (list): keys flagged as slower
+    """
+
+    print('{0:<52} {1:>12} {2:>10} {3:>8}'.format('benchmark', 'time (us)', 'peak (KB)', 'ratio'))
+    for key, result in sorted(results.items()):
+        ratio = ''
+        if baseline and key in baseline:
+            slower = slowdown(result, baseline[key])
+            if slower is not None:
+                ratio = '{0:.2f}'.format(slower[0])
+                if key in regressions:
+                    ratio += ' !'
+        print('{0:<52} {1:>12.1f} {2:>10.1f} {3:>8}'.format(
+            key, result[0] * 1e6, result[1] / 1024.0, ratio))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--memory-target', type=float, default=MEMORY_TARGET,
+                        help='Maximum bytes per menu item')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes)
+    baseline = None
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = []
+    if baseline:
+        regressions = retry(args.sizes, results, baseline, args.tolerance)
+    report(results, baseline, regressions)
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print('Baseline saved to {0}'.format(args.baseline))
+
+    memory = bench_memory(max(args.sizes))
+    for kind, per_item in sorted(memory.items()):
+        over = per_item > args.memory_target
+        print('memory/{0:<45} {1:>12.0f} B/item{2}'.format(
+            kind, per_item, ' > {0:.0f} !'.format(args.memory_target) if over else ''))
+        if over:
+            regressions.append('memory/' + kind)
+
+    if regressions:
+        print('{0} regression(s):'.format(len(regressions)))
+        for key in regressions:
+            print('    ' + key)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Batched writes to the HD44780 of the Adafruit LCD plate.
+
+The plate drives the controller in 4 bit mode from port B of an MCP23017.
+The Adafruit driver sets each pin with its own I2C transaction, about 9 of
+them per character. Here each nibble is two port writes, data with enable
+high then enable low, and the port writes of a whole frame update are
+buffered and sent by bulk transfers.
+
+The expander is put in byte mode so the register address toggles between
+the latches of port B and port A on each byte of a transfer. Port A is
+rewritten with its own value, the port B values follow each other:
+
+    OLATB: B0, A, B1, A, B2 ...
+
+    lcd = BatchedPlate.from_plate(Adafruit_CharLCD.Adafruit_CharLCDPlate())
+    display = Display(lcd)
+"""
+
+import time
+
+
+# MCP23017 registers, IOCON.BANK = 0
+IOCON = 0x0A
+OLATA = 0x14
+OLATB = 0x15
+# Register address toggles within the A/B pair instead of incrementing
+IOCON_SEQOP = 0x20
+
+# Port B pins of the plate
+PIN_RS = 0x80
+PIN_RW = 0x40
+PIN_EN = 0x20
+PIN_D4 = 0x10
+PIN_D5 = 0x08
+PIN_D6 = 0x04
+PIN_D7 = 0x02
+LCD_PINS = PIN_RS | PIN_RW | PIN_EN | PIN_D4 | PIN_D5 | PIN_D6 | PIN_D7
+# Backlight pins, lit when low: red and green on port A, blue on port B
+PIN_RED = 0x40
+PIN_GREEN = 0x80
+PIN_BLUE = 0x01
+
+# Bytes of one bulk transfer, the SMBus block limit
+MAX_TRANSFER = 32
+
+# Commands
+LCD_CLEARDISPLAY = 0x01
+LCD_RETURNHOME = 0x02
+LCD_DISPLAYCONTROL = 0x08
+LCD_SETCGRAMADDR = 0x40
+LCD_SETDDRAMADDR = 0x80
+LCD_DISPLAYON = 0x04
+LCD_CURSORON = 0x02
+LCD_BLINKON = 0x01
+LCD_ROW_OFFSETS = (0x00, 0x40, 0x14, 0x54)
+# Execution time of clear and home, in seconds
+EXEC_TIME_LONG = 1.52e-3
+
+
+def nibble_pins(nibble):
+    """Port B data pins of a nibble. D4 to D7 are wired in reverse order.
+
+    Returns:
+        int:
+    """
+
+    return ((PIN_D4 if nibble & 0x1 else 0) | (PIN_D5 if nibble & 0x2 else 0) |
+            (PIN_D6 if nibble & 0x4 else 0) | (PIN_D7 if nibble & 0x8 else 0))
+
+# Data pins of every nibble
+NIBBLE_PINS = [nibble_pins(nibble) for nibble in range(16)]
+
+
+class PlateBus():
+    """Buffer of port B writes to the MCP23017 of the plate"""
+
+    def __init__(self, device):
+        """
+        Parameters:
+            device: I2C device of the expander, like Adafruit_GPIO.I2C.Device,
+                with write8, writeList and readU8
+        """
+
+        self.device = device
+        # Enable byte mode and read the latches the plate driver left
+        device.write8(IOCON, device.readU8(IOCON) | IOCON_SEQOP)
+        self.port_a = device.readU8(OLATA)
+        # Port A value on the expander
+        self._sent_a = self.port_a
+        # Other pins of port B, like the blue backlight
+        self._port_b = device.readU8(OLATB) & ~LCD_PINS
+        self._last = self._port_b
+        self._states = []
+        # Stats
+        self.transfers = 0
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._states)
+
+    def set_color(self, red, green, blue):
+        """Switch the backlight colors on or off. Queued with the writes and
+        kept by every later write of the ports.
+
+        Parameters:
+            red (bool):
+            green (bool):
+            blue (bool):
+        """
+
+        port_a = self.port_a | PIN_RED | PIN_GREEN
+        if red:
+            port_a &= ~PIN_RED
+        if green:
+            port_a &= ~PIN_GREEN
+        self.port_a = port_a
+        self._port_b = self._port_b & ~PIN_BLUE if blue else self._port_b | PIN_BLUE
+        # Port B as last written, with the new blue pin
+        self._last = (self._last & LCD_PINS) | self._port_b
+        self._states.append(self._last)
+
+    def write8(self, value, char_mode=False):
+        """Queue a command, or a data byte when char_mode"""
+
+        rs = PIN_RS if char_mode else 0
+        base = self._port_b | rs
+        states = self._states
+        if (self._last & PIN_RS) != rs:
+            # RS settles before enable rises
+            states.append(base)
+        for nibble in (value >> 4, value & 0x0F):
+            pins = base | NIBBLE_PINS[nibble]
+            # The controller reads the nibble when enable falls
+            states.append(pins | PIN_EN)
+            states.append(pins)
+        self._last = states[-1]
+
+    def flush(self):
+        """Send the queued port writes
+
+        Returns:
+            int: Number of transfers
+        """
+
+        states = self._states
+        if not states:
+            return 0
+        # Port B values separated by the port A value
+        per_transfer = (MAX_TRANSFER + 1) // 2
+        transfers = 0
+        for start in range(0, len(states), per_transfer):
+            data = []
+            for state in states[start:start + per_transfer]:
+                data.append(state)
+                data.append(self.port_a)
+            if self._sent_a == self.port_a:
+                # Port A is unchanged, no need to end with it
+                data.pop()
+            self._sent_a = self.port_a
+            self.device.writeList(OLATB, data)
+            transfers += 1
+            self.bytes += len(data)
+        self.transfers += transfers
+        self._states = []
+        return transfers
+
+
+class BatchedPlate():
+    """Adafruit_CharLCD surface writing through a PlateBus. Writes are
+    sent on flush, which Display calls after each update.
+
+    The controller must already be initialized, by the Adafruit driver.
+    """
+
+    def __init__(self, device, cols=16, lines=2, plate=None):
+        """
+        Parameters:
+            device: I2C device of the expander, see PlateBus
+            cols (int): Display width in characters
+            lines (int): Display height in characters
+            plate (Adafruit_CharLCDPlate): Driver reading the buttons, if any
+        """
+
+        self.bus = PlateBus(device)
+        self._cols = cols
+        self._lines = lines
+        self.plate = plate
+        self._displaycontrol = LCD_DISPLAYON
+
+    @classmethod
+    def from_plate(cls, plate):
+        """Batched writer on the expander of an initialized plate driver"""
+
+        lcd = cls(plate._mcp._device, plate._cols, plate._lines, plate)
+        lcd._displaycontrol = plate.displaycontrol
+        return lcd
+
+    def write8(self, value, char_mode=False):
+        self.bus.write8(value, char_mode)
+
+    def flush(self):
+        return self.bus.flush()
+
+    def set_color(self, red, green, blue):
+        """Backlight colors, like Adafruit_CharLCDPlate.set_color. The
+        colors set through the plate driver are overwritten by the next
+        frame, they must be set here."""
+
+        self.bus.set_color(red, green, blue)
+        self.bus.flush()
+
+    def set_backlight(self, backlight):
+        self.set_color(backlight, backlight, backlight)
+
+    def _long_command(self, value):
+        self.bus.write8(value)
+        self.bus.flush()
+        time.sleep(EXEC_TIME_LONG)
+
+    def clear(self):
+        self._long_command(LCD_CLEARDISPLAY)
+
+    def home(self):
+        self._long_command(LCD_RETURNHOME)
+
+    def set_cursor(self, col, row):
+        if row > self._lines:
+            row = self._lines - 1
+        self.bus.write8(LCD_SETDDRAMADDR | (col + LCD_ROW_OFFSETS[row]))
+
+    def enable_display(self, enable):
+        self._display_flag(LCD_DISPLAYON, enable)
+
+    def show_cursor(self, show):
+        self._display_flag(LCD_CURSORON, show)
+
+    def blink(self, blink):
+        self._display_flag(LCD_BLINKON, blink)
+
+    def _display_flag(self, flag, enable):
+        if enable:
+            self._displaycontrol |= flag
+        else:
+            self._displaycontrol &= ~flag
+        self.bus.write8(LCD_DISPLAYCONTROL | self._displaycontrol)
+
+    def create_char(self, location, pattern):
+        location &= 0x7
+        self.bus.write8(LCD_SETCGRAMADDR | (location << 3))
+        for i in range(8):
+            self.bus.write8(pattern[i], True)
+
+    def message(self, text):
+        line = 0
+        for char in text:
+            if char == '\n':
+                line += 1
+                self.set_cursor(0, line)
+            else:
+                self.bus.write8(ord(char), True)
+        self.bus.flush()
+
+    def is_pressed(self, button):
+        return self.plate.is_pressed(button)
@@ -0,0 +1,195 @@
+"""Character ROMs of the HD44780.
+
+The controller shows the character of its ROM at the code it is sent, so
+text is encoded to the ROM of the display before being written. The
+common ROMs are A00, ASCII with Japanese katakana and a few Greek
+letters, and A02, ASCII with the Latin-1 letters and symbols.
+
+Characters missing from the ROM are replaced by, in order:
+    - the glyph substituted for them, shown from CGRAM (see lcd_glyph)
+    - their base letter, 'e' for 'é'
+    - the fallback character
+
+Encoding goes through a translation table built ahead of time for the
+characters of the ROM and extended with each new character met, so a
+frame is encoded by a single str.translate.
+"""
+
+import unicodedata
+
+from lcd_glyph import GLYPH_FIRST, GLYPH_LAST, registry
+
+
+def _rom_a00():
+    codes = {chr(code): code for code in range(0x20, 0x7E)}
+    # Yen sign instead of backslash, arrows instead of tilde and delete
+    del codes['\\']
+    codes['¥'] = 0x5C
+    codes['→'] = 0x7E
+    codes['←'] = 0x7F
+    # Half-width katakana, in Unicode order
+    for code, char in enumerate(range(0xFF61, 0xFFA0), 0xA1):
+        codes[chr(char)] = code
+    # Letters with descenders, superscripts and blanks are left out
+    high = ['α', 'ä', 'β', 'ε', 'μ', 'σ', 'ρ', None,
+            '√', None, None, None, '¢', None, 'ñ', 'ö',
+            None, None, 'θ', '∞', 'Ω', 'ü', 'Σ', 'π',
+            None, None, '千', '万', '円', '÷', None, '█']
+    for code, char in enumerate(high, 0xE0):
+        if char is not None:
+            codes[char] = code
+    # Look-alikes
+    codes['°'] = 0xDF
+    codes['µ'] = 0xE4
+    codes['·'] = 0xA5
+    return codes
+
+
+def _rom_a02():
+    codes = {chr(code): code for code in range(0x20, 0x7F)}
+    symbols = ['▶', '◀', '“', '”', '⏫', '⏬', '●', '↵',
+               '↑', '↓', '→', '←', '≤', '≥', '▲', '▼']
+    for code, char in enumerate(symbols, 0x10):
+        codes[char] = code
+    codes['⌂'] = 0x7F
+    cyrillic = ['Б', 'Д', 'Ж', 'З', 'И', 'Й', 'Л', 'П',
+                'У', 'Ц', 'Ч', 'Ш', 'Щ', 'Ъ', 'Ы', 'Э',
+                'α', '♪', 'Γ', 'π', 'Σ', 'σ', '♬', 'τ',
+                '\U0001f514', 'Θ', 'Ω', 'δ', '∞', '♥', 'ε', '∩']
+    for code, char in enumerate(cyrillic, 0x80):
+        codes[char] = code
+    # Latin-1 layout
+    for code in range(0xA1, 0x100):
+        codes[chr(code)] = code
+    return codes
+
+
+# Unicode character: ROM code
+ROMS = {'A00': _rom_a00(),
+        'A02': _rom_a02()}
+
+# Glyphs shown for characters missing from the ROM, see Charset
+SUBSTITUTES = {'\\': 'backslash',
+               '~': 'tilde',
+               'é': 'e_acute',
+               'è': 'e_grave',
+               'à': 'a_grave'}
+
+
+class _Table(dict):
+    """str.translate table computing the characters it does not hold yet"""
+
+    __slots__ = ('charset', )
+
+    def __init__(self, charset):
+        super().__init__()
+        self.charset = charset
+
+    def __missing__(self, code):
+        char = self[code] = self.charset.lookup(chr(code))
+        return char
+
+
+class Charset():
+    """Encoding of text to the character ROM of a display.
+
+    Encoded text holds one character per ROM code, chr(code), and the
+    glyph characters to be shown from CGRAM.
+    """
+
+    def __init__(self, rom='A00', substitutes=None, fallback='?', glyphs=None):
+        """
+        Parameters:
+            rom (str): 'A00' or 'A02'
+            substitutes (dict): char: glyph name shown instead of a character
+                missing from the ROM. None for no substitution, SUBSTITUTES
+                for the glyphs of lcd_glyph.
+            fallback (str): Character shown when there is no replacement
+            glyphs (Glyphs): Registry of the substituted glyphs.
+                lcd_glyph.registry if None
+        """
+
+        try:
+            self.codes = ROMS[rom]
+        except KeyError:
+            raise ValueError('unknown character ROM {0}'.format(rom))
+        self.rom = rom
+        self.glyphs = glyphs if glyphs is not None else registry
+        self.substitutes = dict(substitutes) if substitutes is not None else {}
+        self.fallback = fallback
+        self.table = None
+        self.build()
+
+    def build(self):
+        """Translation table of the ROM characters and substitutes"""
+
+        table = _Table(self)
+        for char in self.codes:
+            table[ord(char)] = self.lookup(char)
+        for char in self.substitutes:
+            table[ord(char)] = self.lookup(char)
+        self.table = table
+
+    def substitute(self, char, name):
+        """Show a glyph instead of a character missing from the ROM
+
+        Parameters:
+            char (str): Character
+            name (str): Glyph name, None to remove the substitution
+        """
+
+        if name is None:
+            self.substitutes.pop(char, None)
+        else:
+            self.substitutes[char] = name
+        self.build()
+
+    def lookup(self, char):
+        """
+        Returns:
+            str: Encoded character
+        """
+
+        # Raw CGRAM codes and glyphs are kept
+        if char < ' ' or GLYPH_FIRST <= char <= GLYPH_LAST:
+            return char
+        code = self.codes.get(char)
+        if code is not None:
+            return chr(code)
+        name = self.substitutes.get(char)
+        if name is not None and name in self.glyphs:
+            return self.glyphs[name]
+        # Letter without its accents
+        base = ''.join(c for c in unicodedata.normalize('NFKD', char)
+                       if not unicodedata.combining(c))
+        if len(base) == 1 and base in self.codes:
+            return chr(self.codes[base])
+        return chr(self.codes.get(self.fallback, 0x3F))
+
+    def encode(self, string):
+        """
+        Returns:
+            str: string with one character per ROM code
+        """
+
+        return string.translate(self.table)
+
+    def encode_frame(self, frame):
+        """
+        Parameters:
+            frame (FrameBuffer): Rendered frame
+
+        Returns:
+            FrameBuffer: New buffer of the encoded frame
+        """
+
+        encoded = str(frame).translate(self.table)
+        return type(frame).from_string(encoded)
+
+
+def get_charset(rom='A00', substitutes=None):
+    """Charset of a ROM, or rom itself when it is a Charset already"""
+
+    if isinstance(rom, Charset):
+        return rom
+    return Charset(rom, substitutes)
@@ -0,0 +1,350 @@
+import concurrent.futures
+import threading
+import time
+
+from lcd_charset import get_charset
+from lcd_glyph import CGRAM, Glyphs
+from lcd_menu import FrameBuffer
+
+
+class Display():
+    """HD44780 writer keeping a shadow copy of the characters on the screen.
+
+    Only the cells that differ from the shadow are sent. Changed cells of a
+    row are grouped into runs written after a single set_cursor, relying on
+    the controller incrementing its address after each character.
+
+    Glyph characters (see lcd_glyph) are written with the CGRAM slot given
+    to them for the frame. Other characters are encoded to the character
+    ROM of the display (see lcd_charset), so the shadow holds ROM codes.
+    """
+
+    def __init__(self, lcd, cursor_cost=1, clear=True, glyphs=None, charset='A00'):
+        """
+        Parameters:
+            lcd: Adafruit_CharLCD compatible object
+            cursor_cost (int): Cost of a set_cursor in character writes.
+                Unchanged gaps up to this length are rewritten instead of
+                moving the cursor over them.
+            clear (bool): Clear the screen so the shadow is known. When False
+                the first update rewrites every row.
+            glyphs (Glyphs): Glyph registry. lcd_glyph.registry if None
+            charset (Charset): Encoding of the text, or the name of the
+                character ROM. Characters sent as they are if None
+        """
+
+        self.lcd = lcd
+        self.charset = get_charset(charset) if charset is not None else None
+        self.cursor_cost = cursor_cost
+        # Sends the writes of an update at once, see lcd_bus.BatchedPlate
+        self._flush = getattr(lcd, 'flush', None)
+        self.cgram = CGRAM(lcd, glyphs)
+        # Code written for each glyph character of the current frame
+        self._codes = {}
+        self._address = None
+        if clear:
+            self.clear()
+        else:
+            self.invalidate()
+
+    @property
+    def size(self):
+        return [self.lcd._cols, self.lcd._lines]
+
+    @property
+    def shadow(self):
+        """Copy of what is on the screen, None for rows in unknown state
+
+        Returns:
+            list: list of str or None
+        """
+
+        return [''.join(row) if row is not None else None for row in self._shadow]
+
+    def clear(self):
+        self.lcd.clear()
+        self._shadow = FrameBuffer(self.size).rows
+        self._address = [0, 0]
+
+    def invalidate(self):
+        """Forget the screen content, next update rewrites every row"""
+
+        self._shadow = [None] * self.size[1]
+        self._address = None
+        self.cgram.invalidate()
+
+    def row_runs(self, row, row_prev):
+        """Changed runs of a row, merged when a gap is cheaper to rewrite
+        than to skip with a cursor move.
+
+        Parameters:
+            row (list): New characters
+            row_prev (list): Characters on screen. None if unknown
+
+        Returns:
+            list: list of [start, end] column ranges
+        """
+
+        if row_prev is None:
+            return [[0, len(row)]]
+        runs = []
+        for col, char in enumerate(row):
+            if char != row_prev[col]:
+                if runs and col - runs[-1][1] <= self.cursor_cost:
+                    runs[-1][1] = col + 1
+                else:
+                    runs.append([col, col + 1])
+        return runs
+
+    def update(self, frame):
+        """Bring the screen to frame content
+
+        Parameters:
+            frame (FrameBuffer or str): Content, cropped or padded to the screen
+
+        Returns:
+            int: Number of commands sent
+        """
+
+        if not isinstance(frame, FrameBuffer):
+            frame = FrameBuffer.from_string(str(frame))
+        frame = frame.crop([0, 0], self.size)
+        if self.charset is not None:
+            frame = self.charset.encode_frame(frame)
+
+        commands = 0
+        chars = set()
+        for row in frame.rows:
+            chars |= Glyphs.find(''.join(row))
+        if chars or self._codes:
+            uploads = self.cgram.uploads
+            codes = self.cgram.allocate(chars)
+            # Each upload is a CGRAM address command and 8 data writes
+            commands += (self.cgram.uploads - uploads) * 9
+            if self.cgram.uploads != uploads:
+                # Uploading moved the controller address
+                self._address = None
+            # Cells of a glyph now written with another code are outdated
+            moved = set(char for char in chars if self._codes.get(char, codes[char]) != codes[char])
+            for y, row_prev in enumerate(self._shadow):
+                if row_prev is not None and moved & set(row_prev):
+                    self._shadow[y] = None
+            self._codes = codes
+
+        for y, row in enumerate(frame.rows):
+            row_prev = self._shadow[y]
+            if row == row_prev:
+                continue
+            for start, end in self.row_runs(row, row_prev):
+                commands += self.write(start, y, row[start:end])
+            self._shadow[y] = row
+        if self._flush is not None:
+            self._flush()
+        return commands
+
+    def show(self, app):
+        """Bring the screen to the current frame of app
+
+        Returns:
+            int: Number of commands sent
+        """
+
+        frame = app.frame()
+        stats = app.stats
+        if stats is None:
+            return self.update(frame)
+        start = time.perf_counter()
+        commands = self.update(frame)
+        stats.phase('bus', time.perf_counter() - start)
+        stats.count('bus_commands', commands)
+        return commands
+
+    def write(self, col, row, chars):
+        """Write characters from a position, moving the cursor only when
+        the controller address is not already there.
+
+        Returns:
+            int: Number of commands sent
+        """
+
+        commands = len(chars)
+        if self._address != [col, row]:
+            self.lcd.set_cursor(col, row)
+            commands += 1
+        codes = self._codes
+        for char in chars:
+            code = codes.get(char)
+            self.lcd.write8(ord(char) if code is None else code, True)
+        self._address = [col + len(chars), row]
+        return commands
+
+    def cursor(self, pos):
+        """Show a blinking cursor at pos, hide it if pos is None"""
+
+        if pos:
+            self.lcd.blink(True)
+            self.lcd.set_cursor(*pos)
+            self._address = list(pos)
+        else:
+            self.lcd.blink(False)
+        if self._flush is not None:
+            self._flush()
+
+
+class DisplayGroup():
+    """Several displays showing the same App.
+
+    The current screen is rendered once per size class, laid out at the
+    size of the displays of that class. Every display keeps its own shadow and sends
+    only its own changes. Displays are written concurrently, so they
+    must be on independent buses, or their LCD objects must serialize
+    the access to a shared one.
+
+    Used in place of a Display by FrameScheduler.
+    """
+
+    def __init__(self, displays):
+        """
+        Parameters:
+            displays (list): list of Display, or of objects with size and
+                update like lcd_process.SharedFrame
+        """
+
+        self.displays = list(displays)
+        self._executor = None
+
+    @property
+    def sizes(self):
+        """
+        Returns:
+            list: Size class of each display
+        """
+
+        return [list(display.size) for display in self.displays]
+
+    def update(self, frames):
+        """Bring every display to its frame
+
+        Parameters:
+            frames (dict): size as tuple: FrameBuffer, see App.frames
+
+        Returns:
+            int: Number of commands sent to all displays
+        """
+
+        displays = self.displays
+        if len(displays) == 1:
+            return displays[0].update(frames[tuple(displays[0].size)])
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(displays), thread_name_prefix='lcd-bus')
+        futures = [self._executor.submit(display.update, frames[tuple(display.size)])
+                   for display in displays]
+        return sum(future.result() for future in futures)
+
+    def show(self, app):
+        """Bring every display to the current screen of app
+
+        Returns:
+            int: Number of commands sent to all displays
+        """
+
+        frames = app.frames(self.sizes)
+        stats = app.stats
+        if stats is None:
+            return self.update(frames)
+        start = time.perf_counter()
+        commands = self.update(frames)
+        stats.phase('bus', time.perf_counter() - start)
+        stats.count('bus_commands', commands)
+        return commands
+
+    def close(self):
+        """Stop the threads writing to the displays"""
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class FrameScheduler():
+    """Renders an App to a Display, or a DisplayGroup, from its own thread.
+
+    Changes only mark the screen dirty, events handled by the App as well
+    as boxes of the current screen changed directly, like label.txt set
+    from another thread. The render thread draws the latest
+    state at most fps times per second, so changes made while a frame is
+    pending or being written collapse into the next frame.
+    """
+
+    def __init__(self, app, display, fps=20):
+        self.app = app
+        self.display = display
+        self.fps = fps
+        # Stats
+        self.frames = 0
+        self.dropped = 0
+        self._dirty = False
+        self._running = False
+        self._last = 0.0
+        self._cond = threading.Condition()
+        self._thread = None
+        app.listeners.append(self.request)
+
+    def request(self):
+        """Mark the screen dirty. Never blocks on the display."""
+
+        with self._cond:
+            if self._dirty:
+                self.dropped += 1
+            self._dirty = True
+            self._cond.notify()
+
+    def render(self):
+        """Draw the current state now
+
+        Returns:
+            int: Number of commands sent
+        """
+
+        stats = self.app.stats
+        if stats is None:
+            commands = self.display.show(self.app)
+        else:
+            # Screen rendering and display writes in a single record
+            with stats.record('frame'):
+                commands = self.display.show(self.app)
+        self.frames += 1
+        return commands
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='lcd-render', daemon=True)
+        self._thread.start()
+        self.request()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._dirty:
+                    self._cond.wait()
+                if not self._running:
+                    return
+            # Let requests pile up until the frame is due
+            delay = self._last + 1.0 / self.fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._cond:
+                self._dirty = False
+            self._last = time.monotonic()
+            self.render()
@@ -0,0 +1,194 @@
+"""Custom characters of the HD44780.
+
+Glyphs are registered by name and stand in text as characters of the
+Unicode private use area, so widgets handle them like any other character.
+The Display maps the glyphs of each frame to the 8 CGRAM slots.
+"""
+
+import collections
+import threading
+
+# Private use area, first character given to a glyph
+GLYPH_BASE = 0xE000
+GLYPH_END = 0xF8FF
+GLYPH_FIRST = chr(GLYPH_BASE)
+GLYPH_LAST = chr(GLYPH_END)
+
+# User-definable characters of the controller
+CGRAM_SLOTS = 8
+
+
+class Glyphs():
+    """Registry of named 5x8 bitmaps"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chars = {}
+        # char: [name, bitmap, fallback]
+        self._glyphs = {}
+
+    def register(self, name, bitmap, fallback='?'):
+        """Add or replace a glyph. A replaced glyph keeps its character and
+        its new bitmap is uploaded the next time it is displayed.
+
+        Parameters:
+            name (str): Glyph name
+            bitmap (list): 8 int, one row of 5 pixels each, top to bottom
+            fallback (str): Character shown when no slot is free
+
+        Returns:
+            str: Character standing for the glyph
+        """
+
+        bitmap = tuple(int(row) & 0x1F for row in bitmap)
+        if len(bitmap) != 8:
+            raise ValueError('glyph bitmap needs 8 rows')
+        with self._lock:
+            char = self._chars.get(name)
+            if char is None:
+                char = chr(GLYPH_BASE + len(self._chars))
+                if char > GLYPH_LAST:
+                    raise ValueError('too many glyphs')
+                self._chars[name] = char
+            self._glyphs[char] = [name, bitmap, fallback]
+        return char
+
+    def __getitem__(self, name):
+        return self._chars[name]
+
+    def __contains__(self, name):
+        return name in self._chars
+
+    def names(self):
+        return list(self._chars)
+
+    def bitmap(self, char):
+        return self._glyphs[char][1]
+
+    def fallback(self, char):
+        return self._glyphs[char][2]
+
+    @staticmethod
+    def find(string):
+        """Glyph characters of a string
+
+        Returns:
+            set: set of str
+        """
+
+        if not string or max(string) < GLYPH_FIRST:
+            return set()
+        return set(char for char in string if GLYPH_FIRST <= char <= GLYPH_LAST)
+
+
+class CGRAM():
+    """Allocation of glyphs to the CGRAM slots of a display.
+
+    Glyphs of the current frame get a slot, the least recently shown glyphs
+    are evicted first. A slot is uploaded only when its bitmap changes.
+    """
+
+    def __init__(self, lcd, glyphs=None, slots=CGRAM_SLOTS):
+        """
+        Parameters:
+            lcd: Adafruit_CharLCD compatible object
+            glyphs (Glyphs): Registry. Module registry if None
+            slots (int): Usable slots, fewer than 8 to keep some for
+                other uses
+        """
+
+        self.lcd = lcd
+        self.glyphs = glyphs if glyphs is not None else registry
+        self.slots = slots
+        # Stats
+        self.uploads = 0
+        # char: slot, least recently shown first
+        self._slot_of = collections.OrderedDict()
+        # Bitmap in each slot, None if unknown
+        self._content = [None] * slots
+
+    def invalidate(self):
+        """Forget the slot contents, after the controller was reset"""
+
+        self._slot_of.clear()
+        self._content = [None] * self.slots
+
+    def allocate(self, chars):
+        """Give a slot to every glyph of a frame, up to the number of slots
+
+        Parameters:
+            chars (set): Glyph characters of the frame
+
+        Returns:
+            dict: char: code to send, slot number or fallback character code
+        """
+
+        codes = {}
+        missing = []
+        for char in chars:
+            slot = self._slot_of.get(char)
+            if slot is None:
+                missing.append(char)
+            else:
+                self._slot_of.move_to_end(char)
+                codes[char] = slot
+        # Slots never used, then slots of glyphs not in this frame
+        free = [slot for slot in range(self.slots) if slot not in self._slot_of.values()]
+        evictable = [char for char in self._slot_of if char not in chars]
+        for char in sorted(missing):
+            if free:
+                slot = free.pop(0)
+            elif evictable:
+                slot = self._slot_of.pop(evictable.pop(0))
+            else:
+                codes[char] = ord(self.glyphs.fallback(char))
+                continue
+            self._slot_of[char] = slot
+            codes[char] = slot
+        for char, slot in self._slot_of.items():
+            if char in chars:
+                self.upload(slot, self.glyphs.bitmap(char))
+        return codes
+
+    def upload(self, slot, bitmap):
+        """Write a bitmap to a slot unless it is already there
+
+        Returns:
+            bool: True if written
+        """
+
+        if self._content[slot] == bitmap:
+            return False
+        self.lcd.create_char(slot, list(bitmap))
+        self._content[slot] = bitmap
+        self.uploads += 1
+        return True
+
+
+registry = Glyphs()
+
+
+def glyph(name):
+    """
+    Returns:
+        str: Character standing for a glyph of the module registry
+    """
+
+    return registry[name]
+
+
+registry.register('left', [0x00, 0x04, 0x08, 0x1F, 0x08, 0x04, 0x00, 0x00], '<')
+registry.register('right', [0x00, 0x04, 0x02, 0x1F, 0x02, 0x04, 0x00, 0x00], '>')
+registry.register('up', [0x04, 0x0E, 0x15, 0x04, 0x04, 0x04, 0x04, 0x00], '^')
+registry.register('down', [0x04, 0x04, 0x04, 0x04, 0x15, 0x0E, 0x04, 0x00], 'v')
+registry.register('check', [0x00, 0x01, 0x03, 0x16, 0x1C, 0x08, 0x00, 0x00], '*')
+# Progress bar cells filled by 1 to 5 columns
+for _columns in range(1, 6):
+    registry.register('bar{0}'.format(_columns),
+                      [(0x1F << (5 - _columns)) & 0x1F] * 8, '#' if _columns > 2 else ' ')
+# Characters missing from the A00 character ROM, see lcd_charset
+registry.register('backslash', [0x00, 0x10, 0x08, 0x04, 0x02, 0x01, 0x00, 0x00], '/')
+registry.register('tilde', [0x00, 0x00, 0x00, 0x0D, 0x12, 0x00, 0x00, 0x00], '-')
+registry.register('e_acute', [0x02, 0x04, 0x0E, 0x11, 0x1F, 0x10, 0x0E, 0x00], 'e')
+registry.register('e_grave', [0x08, 0x04, 0x0E, 0x11, 0x1F, 0x10, 0x0E, 0x00], 'e')
+registry.register('a_grave', [0x08, 0x04, 0x0E, 0x01, 0x0F, 0x11, 0x0F, 0x00], 'a')
@@ -0,0 +1,112 @@
+import queue
+import threading
+
+
+class Button(object):
+
+    def __init__(self, name, id, continuous=False,
+                 check_fct=None, check_args=(), check_kwargs={}, debounce=1):
+        self.name = name
+        self.id = id
+        self.continuous = continuous
+        self.last_value = False
+        # Check
+        self.check_fct = check_fct
+        self.check_args = check_args
+        self.check_kwargs = check_kwargs
+        # Debounce
+        self.debounce = debounce
+        self._raw = False
+        self._stable = 0
+
+    def __repr__(self):
+        return '<Button> {0}'.format(self.name)
+
+    def read(self):
+        """Debounced state. A new raw state is accepted once it has been
+        sampled debounce times in a row.
+
+        Returns:
+            bool: True if pressed
+        """
+
+        raw = bool(self.check_fct(*self.check_args, **self.check_kwargs))
+        if raw == self._raw:
+            self._stable += 1
+        else:
+            self._raw = raw
+            self._stable = 1
+        if self._stable >= self.debounce:
+            return raw
+        return self.last_value
+
+    @property
+    def value(self):
+        if self.check_fct:
+            old_last = self.last_value
+            # custom check
+            value = self.read()
+            self.last_value = value
+            # true or
+            if value:
+                return not old_last or self.continuous
+        self.last_value = False
+        return
+
+
+class Input():
+    """Polls buttons from a background thread and queues their presses.
+
+    The thread sleeps between samples so an idle menu costs next to no CPU.
+    Edge interrupt callbacks can feed the same queue with push().
+    """
+
+    def __init__(self, buttons, rate=50, events=None):
+        """
+        Parameters:
+            buttons (list): list of Button
+            rate (float): Samples per second
+            events (queue.Queue): Destination of pressed Button. New if None
+        """
+
+        self.buttons = buttons
+        self.rate = rate
+        self.events = events if events is not None else queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """Sample every button once and queue the pressed ones
+
+        Returns:
+            int: Number of queued events
+        """
+
+        count = 0
+        for btn in self.buttons:
+            if btn.value:
+                self.push(btn)
+                count += 1
+        return count
+
+    def push(self, btn):
+        self.events.put(btn)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='lcd-input', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        period = 1.0 / self.rate
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(period)
@@ -0,0 +1,243 @@
+"""Menus defined in JSON or TOML files.
+
+A definition names its screens and the first one shown:
+
+    {"start": "welcome",
+     "screens": {
+        "welcome": {"type": "PushButton", "label": "Welcome",
+                    "size": [16, 2], "auto_size": false,
+                    "actions": ["below_any"], "below": "home"},
+        "home": {"type": "ItemsMenu", "size": [16, 2], "auto_size": false,
+                 "actions": ["vert_next", "vert_prev"], "above": "welcome",
+                 "items": [{"type": "PushButton", "label": "Turntable"},
+                           {"type": "PushButton", "label": "Settings"}]}}}
+
+Other keys of a widget are arguments of its class. "actions" name Action
+objects given when loading, "above" and "below" name screens. A widget
+whose size may change after loading, like a label updated at run time,
+sets "dynamic": true.
+
+Compiling builds every screen once, then stores the resolved size and the
+rendered text of each widget. Loading a compiled file creates a screen
+only when it is first shown, with sizes and first render already known.
+
+Run:
+    python lcd_loader.py menu.json menu.lcdc
+"""
+
+import argparse
+import json
+import sys
+
+from lcd_menu import (Box, ItemsChoice, ItemsMenu, Label, ProgressBar,
+                      PushButton, string_size)
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import toml as tomllib
+    except ImportError:
+        tomllib = None
+
+
+COMPILED_VERSION = 1
+
+WIDGETS = {'Box': Box,
+           'Label': Label,
+           'PushButton': PushButton,
+           'ItemsMenu': ItemsMenu,
+           'ItemsChoice': ItemsChoice,
+           'ProgressBar': ProgressBar}
+
+# Keys of a widget definition that are not class arguments
+NODE_KEYS = ('type', 'items', 'actions', 'above', 'below', 'dynamic', 'render')
+
+
+def read_definition(path):
+    """
+    Parameters:
+        path (str): .json or .toml menu definition, or a compiled file
+
+    Returns:
+        dict:
+    """
+
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise ImportError('reading TOML menus needs Python 3.11 or the toml package')
+        with open(path) as f:
+            return tomllib.loads(f.read())
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_node(node, actions=None):
+    """Create a widget and its items from a definition node
+
+    Parameters:
+        node (dict): Widget definition
+        actions (dict): name: Action
+
+    Returns:
+        Box:
+    """
+
+    try:
+        cls = WIDGETS[node.get('type', 'Box')]
+    except KeyError:
+        raise ValueError('unknown widget type {0}'.format(node.get('type')))
+    kwargs = {key: value for key, value in node.items() if key not in NODE_KEYS}
+    if 'items' in node:
+        kwargs['items'] = [build_node(item, actions) for item in node['items']]
+    if 'actions' in node:
+        try:
+            kwargs['actions'] = [actions[name] for name in node['actions']]
+        except (KeyError, TypeError):
+            raise ValueError('actions {0} are not given'.format(node['actions']))
+    box = cls(**kwargs)
+    # Screen names, resolved by App
+    box.above = node.get('above')
+    box.below = node.get('below')
+    return box
+
+
+def compile_node(node, box):
+    """Copy of a definition node with the resolved size and render of box
+
+    Returns:
+        dict:
+    """
+
+    compiled = dict(node)
+    # Boxes showing another box take its text, and maybe its size, first
+    txt = str(box)
+    size = list(box.size)
+    if not node.get('dynamic'):
+        compiled['size'] = size
+        compiled['auto_size'] = False
+    compiled['render'] = [size, txt]
+    if 'items' in node:
+        compiled['items'] = [compile_node(item, child) for item, child in zip(node['items'], box.items)]
+    return compiled
+
+
+def compile_definition(definition):
+    """Resolve sizes and render every screen of a definition
+
+    Parameters:
+        definition (dict): Menu definition
+
+    Returns:
+        dict: Compiled definition
+    """
+
+    screens = {}
+    for name, node in definition['screens'].items():
+        # Actions are only needed when running
+        stripped = strip_actions(node)
+        box = build_node(stripped)
+        box.layout()
+        screens[name] = compile_node(node, box)
+    return {'compiled': COMPILED_VERSION,
+            'start': definition['start'],
+            'screens': screens}
+
+
+def strip_actions(node):
+    node = {key: value for key, value in node.items() if key != 'actions'}
+    if 'items' in node:
+        node['items'] = [strip_actions(item) for item in node['items']]
+    return node
+
+
+def compile_file(src, dst):
+    """Compile a menu definition file ahead of time"""
+
+    compiled = compile_definition(read_definition(src))
+    with open(dst, 'w') as f:
+        json.dump(compiled, f, separators=(',', ':'))
+
+
+class Screens():
+    """Screens of a definition, created the first time they are read.
+
+    Used as App.screens so screen names of above and below links are
+    resolved on navigation.
+    """
+
+    def __init__(self, definition, actions=None):
+        """
+        Parameters:
+            definition (dict): Menu definition, compiled or not
+            actions (dict): name: Action used by the definition
+        """
+
+        if definition.get('compiled') != COMPILED_VERSION:
+            definition = compile_definition(definition)
+        self.definition = definition
+        self.actions = actions if actions is not None else {}
+        self._screens = {}
+
+    @property
+    def start(self):
+        return self[self.definition['start']]
+
+    def __contains__(self, name):
+        return name in self.definition['screens']
+
+    def __getitem__(self, name):
+        screen = self._screens.get(name)
+        if screen is None:
+            node = self.definition['screens'][name]
+            screen = self._screens[name] = build_node(node, self.actions)
+            self.seed(node, screen)
+        return screen
+
+    def built(self):
+        """
+        Returns:
+            list: Names of the screens created so far
+        """
+
+        return list(self._screens)
+
+    @staticmethod
+    def seed(node, box):
+        """Give a new widget tree its compiled render, so showing it first
+        needs no size resolution nor rendering."""
+
+        if 'items' in node:
+            for item, child in zip(node['items'], box.items):
+                Screens.seed(item, child)
+        render = node.get('render')
+        if render is not None and not node.get('dynamic'):
+            size, txt = render
+            box._layout = (size, string_size(str(box._txt)))
+            box._cache = [size, txt, None, None]
+
+
+def load(path, actions=None):
+    """
+    Parameters:
+        path (str): Menu definition or compiled file
+        actions (dict): name: Action used by the definition
+
+    Returns:
+        Screens:
+    """
+
+    return Screens(read_definition(path), actions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compile a menu definition')
+    parser.add_argument('src', help='.json or .toml menu definition')
+    parser.add_argument('dst', help='Compiled file')
+    args = parser.parse_args(argv)
+    compile_file(args.src, args.dst)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
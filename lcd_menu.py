@@ -1,3 +1,12 @@
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import queue
+import sys
+import threading
+import time
+
 HORIZONTAL = 0
 VERTICAL = 1
 
@@ -7,6 +16,24 @@ ALIGN_RIGHT = 2
 ALIGN_TOP = 0
 ALIGN_BOTTOM = 2
 
+JOB_PENDING = 0
+JOB_RUNNING = 1
+JOB_DONE = 2
+JOB_FAILED = 3
+JOB_CANCELLED = 4
+
+# Threads running background actions
+BACKGROUND_WORKERS = 2
+
+# Rendered screens kept by App for navigation
+FRAME_CACHE_SIZE = 4
+
+# App handling a trigger in the current thread, see App.handle
+_dispatch = threading.local()
+
+# Event queued to wake App.process up for calls, see App.call_soon
+_WAKE = object()
+
 
 def string_size(string):
     """2D dimension of string once printed. Units are char.
@@ -23,6 +50,11 @@ def string_size(string):
 
     return [col, len(rows)]
 
+def _size_key(size):
+    """Hashable size, None stays None"""
+
+    return None if size is None else tuple(size)
+
 def prod_iters(*iterables):
     """Product of iterables component-wise
 
@@ -56,8 +88,21 @@ def get_align_offset(string, size, align):
 
     """
 
-    str_list = string.split('\n')
-    str_size = string_size(string)
+    return size_align_offset(string_size(string), size, align)
+
+def size_align_offset(str_size, size, align):
+    """Returns the positional offset of aligning a content size inside a box
+
+    Parameters:
+        str_size (list): List of int [width, height] Content size
+        size (list): List of int [width, height] Box size
+        align (list): list of int
+
+    Returns:
+        list: List of int [x, y]
+
+    """
+
     delta = [-size[0]+str_size[0], -size[1]+str_size[1]]
     center_x = float(align[0])*float(delta[0])/2.0
     center_y = float(align[1])*float(delta[1])/2.0
@@ -99,12 +144,9 @@ def get_char_at_pos(string, pos, filler=' '):
     """
 
     str_list = string.split('\n')
-    try:
-        if pos[0] < 0 or pos[1] < 0:
-            raise
+    if 0 <= pos[1] < len(str_list) and 0 <= pos[0] < len(str_list[pos[1]]):
         return str_list[pos[1]][pos[0]]
-    except:
-        return filler
+    return filler
 
 def string_move(string, size, offset, loop, filler=' '):
     """Move and return a string inside a box
@@ -120,17 +162,8 @@ def string_move(string, size, offset, loop, filler=' '):
         string: Modified string
     """
 
-    new_str = ''
-    for row in range(size[1]):
-        for col in range(size[0]):
-            char_offset = [col+offset[0], row+offset[1]]
-            if loop:
-                char_offset = get_loop_offset(char_offset, size)
-            new_str += get_char_at_pos(string, char_offset, filler=filler)
-        if row < size[1]-1:
-            new_str += '\n'
-
-    return new_str
+    frame = FrameBuffer.from_string(string, filler=filler)
+    return str(frame.crop(offset, size, loop=loop, filler=filler))
 
 def string_align_move(string, size, offset, align, loop, filler=' '):
     """Align and position a string in relation to a size 
@@ -149,16 +182,608 @@ def string_align_move(string, size, offset, align, loop, filler=' '):
 
     """
 
+    return str(frame_align_move(FrameBuffer.from_string(string, filler=filler),
+                                size, offset, align, loop, filler=filler))
+
+def frame_align_move(frame, size, offset, align, loop, filler=' '):
+    """Align and position a FrameBuffer in relation to a size
+
+    Parameters:
+        frame (FrameBuffer): Source content
+        size (list): list of int [widht, height]
+        offset (list): list of int [x, y]
+        align (list): list of int
+        loop (bool): True if content is looping
+        filler (str): Single character for filling. Space by default
+
+    Returns:
+        FrameBuffer: New buffer of the requested size
+
+    """
+
     # calculate offset
-    align_offset = get_align_offset(string, size, align=align)
+    align_offset = size_align_offset(frame.size, size, align)
     offset = [offset[0] + align_offset[0], offset[1] + align_offset[1]]
     # apply offset
-    return string_move(string, size, offset, loop, filler=filler)
+    return frame.crop(offset, size, loop=loop, filler=filler)
+
+
+class FrameBuffer():
+    """Fixed size grid of characters.
+
+    Each row is a list of single characters so a row can be updated in
+    place with slice assignment without changing its length.
+    """
+
+    __slots__ = ('width', 'height', 'rows')
+
+    def __init__(self, size, filler=' '):
+        self.width = max(size[0], 0)
+        self.height = max(size[1], 0)
+        self.rows = [[filler] * self.width for _ in range(self.height)]
+
+    @classmethod
+    def from_string(cls, string, filler=' '):
+        """Build a buffer holding a multi-line string.
+        Short rows are padded with filler.
+
+        Parameters:
+            string (str):
+            filler (str): Single character for filling. Space by default
+
+        Returns:
+            FrameBuffer:
+        """
+
+        rows = string.split('\n')
+        frame = cls([0, 0])
+        frame.width = max([len(row) for row in rows])
+        frame.height = len(rows)
+        frame.rows = [list(row.ljust(frame.width, filler)) for row in rows]
+        return frame
+
+    def __str__(self):
+        return '\n'.join([''.join(row) for row in self.rows])
+
+    def __eq__(self, other):
+        if isinstance(other, FrameBuffer):
+            return self.rows == other.rows
+        return NotImplemented
+
+    @property
+    def size(self):
+        return [self.width, self.height]
+
+    def lines(self):
+        """Rows as strings
+
+        Returns:
+            list: list of str
+        """
+
+        return [''.join(row) for row in self.rows]
+
+    def fill(self, char=' ', pos=[0, 0], size=None):
+        """Fill a rectangle with a character. Clipped to the buffer.
+
+        Parameters:
+            char (str): Single character
+            pos (list): List of int [x, y] Top left corner
+            size (list): List of int [width, height]. Whole buffer if None
+        """
+
+        if size is None:
+            size = self.size
+        x0, x1 = max(pos[0], 0), min(pos[0] + size[0], self.width)
+        y0, y1 = max(pos[1], 0), min(pos[1] + size[1], self.height)
+        if x0 >= x1:
+            return
+        for y in range(y0, y1):
+            self.rows[y][x0:x1] = [char] * (x1 - x0)
+
+    def blit(self, src, pos=[0, 0], clip=None):
+        """Copy another buffer into this one. Clipped to the buffer.
+
+        Parameters:
+            src (FrameBuffer): Source content
+            pos (list): List of int [x, y] Destination of the source top left
+            clip (list): List of int [x0, y0, x1, y1] Writable rectangle.
+                Whole buffer if None
+        """
+
+        x0, x1 = max(pos[0], 0), min(pos[0] + src.width, self.width)
+        y0, y1 = max(pos[1], 0), min(pos[1] + src.height, self.height)
+        if clip is not None:
+            x0, x1 = max(x0, clip[0]), min(x1, clip[2])
+            y0, y1 = max(y0, clip[1]), min(y1, clip[3])
+        if x0 >= x1:
+            return
+        sx0, sx1 = x0 - pos[0], x1 - pos[0]
+        for y in range(y0, y1):
+            self.rows[y][x0:x1] = src.rows[y - pos[1]][sx0:sx1]
+
+    def blit_lines(self, lines, pos=[0, 0], clip=None):
+        """Copy lines of text of the same length into this buffer, like
+        blit without building a buffer of them first.
+
+        Parameters:
+            lines (list): list of str
+            pos (list): List of int [x, y] Destination of the first line start
+            clip (list): List of int [x0, y0, x1, y1] Writable rectangle.
+                Whole buffer if None
+        """
+
+        if not lines:
+            return
+        px, py = pos
+        px1, py1 = px + len(lines[0]), py + len(lines)
+        if clip is None:
+            cx0, cy0, cx1, cy1 = 0, 0, self.width, self.height
+        else:
+            # Clip rectangles of views are inside their buffer
+            cx0, cy0, cx1, cy1 = clip
+        x0 = px if px > cx0 else cx0
+        x1 = px1 if px1 < cx1 else cx1
+        y0 = py if py > cy0 else cy0
+        y1 = py1 if py1 < cy1 else cy1
+        if x0 >= x1:
+            return
+        rows = self.rows
+        if x0 == px and x1 == px1:
+            for y in range(y0, y1):
+                rows[y][x0:x1] = lines[y - py]
+        else:
+            sx0, sx1 = x0 - px, x1 - px
+            for y in range(y0, y1):
+                rows[y][x0:x1] = lines[y - py][sx0:sx1]
+
+    def crop(self, offset, size, loop=False, filler=' '):
+        """Return a window of the buffer
+
+        Parameters:
+            offset (list): List of int [x, y] Position of the window
+            size (list): List of int [width, height] Window size
+            loop (bool): Wrap the window around its own size
+            filler (str): Single character for cells outside the buffer
+
+        Returns:
+            FrameBuffer: New buffer of the requested size
+        """
+
+        width, height = max(size[0], 0), max(size[1], 0)
+        frame = FrameBuffer([width, 0])
+        frame.height = height
+        if loop and width and height:
+            # Content seen through the window is repeated every window size
+            tile = self.crop([0, 0], size, filler=filler).rows
+            shift = offset[0] % width
+            for row in range(height):
+                line = tile[(row + offset[1]) % height]
+                frame.rows.append(line[shift:] + line[:shift])
+            return frame
+
+        x0, x1 = offset[0], offset[0] + width
+        pad_left = [filler] * min(max(-x0, 0), width)
+        pad_right = [filler] * min(max(x1 - self.width, 0), width)
+        blank = [filler] * width
+        for row in range(offset[1], offset[1] + height):
+            if 0 <= row < self.height and x1 > 0 and x0 < self.width:
+                line = self.rows[row][max(x0, 0):x1]
+                frame.rows.append(pad_left + line + pad_right)
+            else:
+                frame.rows.append(list(blank))
+        return frame
+
+
+class FrameView():
+    """Clipped region of a FrameBuffer. Boxes draw into it in place, so a
+    parent buffer is filled by its children without intermediate copies.
+    """
+
+    __slots__ = ('buffer', 'origin', 'clip')
+
+    def __init__(self, buffer, pos=[0, 0], size=None, clip=None):
+        """
+        Parameters:
+            buffer (FrameBuffer): Destination
+            pos (list): List of int [x, y] Region top left in the buffer,
+                may be outside of it
+            size (list): List of int [width, height]. Rest of the buffer
+                if None
+            clip (list): List of int [x0, y0, x1, y1] Limits of the
+                enclosing region
+        """
+
+        if size is None:
+            size = [buffer.width - pos[0], buffer.height - pos[1]]
+        self.buffer = buffer
+        self.origin = [pos[0], pos[1]]
+        rect = [max(pos[0], 0), max(pos[1], 0),
+                min(pos[0] + size[0], buffer.width), min(pos[1] + size[1], buffer.height)]
+        if clip is not None:
+            rect = [max(rect[0], clip[0]), max(rect[1], clip[1]),
+                    min(rect[2], clip[2]), min(rect[3], clip[3])]
+        self.clip = rect
+
+    def view(self, pos, size):
+        """Region inside this one, pos relative to this region"""
+
+        return FrameView(self.buffer, [self.origin[0] + pos[0], self.origin[1] + pos[1]], size, self.clip)
+
+    def blit(self, src, pos=[0, 0]):
+        self.buffer.blit(src, [self.origin[0] + pos[0], self.origin[1] + pos[1]], self.clip)
+
+    def blit_lines(self, lines, pos=[0, 0]):
+        self.buffer.blit_lines(lines, [self.origin[0] + pos[0], self.origin[1] + pos[1]], self.clip)
+
+
+class SizeIndex():
+    """Lengths of a sequence of entries with prefix sums in O(log n).
+
+    Backed by a Fenwick tree so a length can change without rebuilding.
+    """
+
+    def __init__(self, lengths=[]):
+        self._lengths = list(lengths)
+        self._tree = [0] * (len(self._lengths) + 1)
+        for i, length in enumerate(self._lengths):
+            j = i + 1
+            self._tree[j] += length
+            parent = j + (j & -j)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[j]
+        self.total = sum(self._lengths)
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def __getitem__(self, index):
+        return self._lengths[index]
+
+    def update(self, index, length):
+        delta = length - self._lengths[index]
+        if not delta:
+            return
+        self._lengths[index] = length
+        self.total += delta
+        j = index + 1
+        while j < len(self._tree):
+            self._tree[j] += delta
+            j += j & -j
+
+    def start(self, index):
+        """Sum of the lengths before index
+
+        Parameters:
+            index (int):
+
+        Returns:
+            int:
+        """
+
+        total = 0
+        j = index
+        while j > 0:
+            total += self._tree[j]
+            j -= j & -j
+        return total
+
+    def find(self, pos):
+        """Index of the entry covering a position
+
+        Parameters:
+            pos (int): Position from the start of the first entry
+
+        Returns:
+            int: Entry index, len(self) when pos is past the end
+        """
+
+        if pos < 0:
+            return 0
+        index = 0
+        bit = 1 << (len(self._lengths).bit_length())
+        while bit:
+            j = index + bit
+            if j < len(self._tree) and self._tree[j] <= pos:
+                index = j
+                pos -= self._tree[j]
+            bit >>= 1
+        return index
+
+
+class PatternSizeIndex():
+    """SizeIndex of entries whose lengths repeat a short pattern, like
+    same size items separated by dividers. Nothing is stored per entry.
+    """
+
+    def __init__(self, count, pattern):
+        self.count = count
+        self.pattern = list(pattern)
+        self.period = sum(self.pattern)
+        self.total = self.start(count)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.pattern[index % len(self.pattern)]
+
+    def update(self, index, length):
+        pass
+
+    def start(self, index):
+        turns, rest = divmod(index, len(self.pattern))
+        return turns * self.period + sum(self.pattern[:rest])
+
+    def find(self, pos):
+        if pos < 0:
+            return 0
+        if pos >= self.total:
+            return self.count
+        turns, rest = divmod(pos, self.period)
+        index = turns * len(self.pattern)
+        for length in self.pattern:
+            if rest < length:
+                break
+            rest -= length
+            index += 1
+        return index
+
+
+class ItemProvider():
+    """Items of a menu created on demand.
+
+    Only the last used items are kept. The neighbours of the selection can
+    be created ahead of time from a background thread, items failing there
+    are reported in errors and to on_error.
+    """
+
+    def __init__(self, length, get_item, item_length=1, cache_size=64):
+        """
+        Parameters:
+            length (int): Number of items, or function returning it
+            get_item (function): Box or str at an index
+            item_length (int): Length of every item along the menu
+                orientation, or function of the index returning it
+            cache_size (int): Number of created items kept
+        """
+
+        self._length = length
+        self.get_item = get_item
+        self.item_length = item_length
+        self.cache_size = cache_size
+        # Menu displaying the items
+        self.parent = None
+        self._cache = collections.OrderedDict()
+        self._lock = threading.RLock()
+        # index: exception raised creating the item from the prefetch thread
+        self.errors = collections.OrderedDict()
+        # Called with the index and the exception of a failed prefetch.
+        # index is None if the length failed
+        self.on_error = None
+        self._requests = None
+        self._thread = None
+
+    def __len__(self):
+        if callable(self._length):
+            return self._length()
+        return self._length
+
+    def __getitem__(self, index):
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError('item index out of range')
+        with self._lock:
+            item = self._cache.get(index)
+            if item is not None:
+                self._cache.move_to_end(index)
+                return item
+        item = self.create(index)
+        with self._lock:
+            # Might have been created by the prefetch thread meanwhile
+            if index in self._cache:
+                self._cache.move_to_end(index)
+                return self._cache[index]
+            self._cache[index] = item
+            self.errors.pop(index, None)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return item
+
+    def create(self, index):
+        item = self.get_item(index)
+        if not isinstance(item, Box):
+            item = Label(item)
+        item._parent = self.parent
+        return item
+
+    def index(self, item):
+        with self._lock:
+            for index, cached in self._cache.items():
+                if cached is item:
+                    return index
+        raise ValueError('item is not loaded')
+
+    def materialized(self):
+        """
+        Returns:
+            list: Items currently created
+        """
+
+        with self._lock:
+            return list(self._cache.values())
+
+    def clear(self):
+        """Forget the created items, after the source data changed"""
+
+        # Pending prefetches are for the old data
+        self.stop()
+        with self._lock:
+            self._cache.clear()
+            self.errors.clear()
+        if self.parent is not None:
+            self.parent.items = self
+
+    def size_index(self, div_length=None):
+        """Lengths of the items, and dividers if div_length is given
+
+        Returns:
+            SizeIndex or PatternSizeIndex:
+        """
+
+        count = len(self)
+        if not callable(self.item_length):
+            if div_length is None:
+                return PatternSizeIndex(count, [self.item_length])
+            return PatternSizeIndex(max(count * 2 - 1, 0), [self.item_length, div_length])
+        lengths = []
+        for index in range(count):
+            if index and div_length is not None:
+                lengths.append(div_length)
+            lengths.append(self.item_length(index))
+        return SizeIndex(lengths)
+
+    def prefetch(self, index, radius=None):
+        """Create the items around index from a background thread
+
+        Parameters:
+            index (int): Center, usually the selected item
+            radius (int): Items to create on each side. A quarter of the
+                cache size if None
+        """
+
+        if radius is None:
+            radius = self.cache_size // 4
+        with self._lock:
+            if self._thread is None:
+                self._requests = queue.Queue()
+                self._thread = threading.Thread(target=self._prefetch, args=(self._requests,),
+                                                name='lcd-prefetch', daemon=True)
+                self._thread.start()
+            self._requests.put((index, radius))
+
+    def stop(self):
+        """End the prefetch thread once done with the item being created.
+        The next prefetch starts a new one."""
+
+        with self._lock:
+            if self._thread is None:
+                return
+            self._requests.put(None)
+            self._requests = None
+            self._thread = None
+
+    def failed(self, index, error):
+        """Report an exception raised from the prefetch thread
+
+        Parameters:
+            index (int): Item index, None if the length failed
+            error (Exception):
+        """
+
+        with self._lock:
+            self.errors[index] = error
+            while len(self.errors) > self.cache_size:
+                self.errors.popitem(last=False)
+        if self.on_error is not None:
+            self.on_error(index, error)
+
+    def _prefetch(self, requests):
+        while True:
+            request = requests.get()
+            # Only the latest selection matters
+            while request is not None and not requests.empty():
+                request = requests.get()
+            if request is None:
+                return
+            index, radius = request
+            try:
+                count = len(self)
+            except Exception as error:
+                self.failed(None, error)
+                continue
+            if not count:
+                continue
+            for step in range(radius + 1):
+                for near in set([(index + step) % count, (index - step) % count]):
+                    with self._lock:
+                        loaded = near in self._cache
+                    if not loaded:
+                        try:
+                            self[near]
+                        except Exception as error:
+                            self.failed(near, error)
+                if not requests.empty():
+                    break
+
+
+class PagedItemProvider(ItemProvider):
+    """ItemProvider loading its items by pages, for sources read in chunks
+    like database queries or log files."""
+
+    def __init__(self, length, get_page, page_size=32, pages=4, **kwargs):
+        """
+        Parameters:
+            length (int): Number of items, or function returning it
+            get_page (function): Iterable of the items of a page number
+            page_size (int): Items per page
+            pages (int): Number of loaded pages kept
+        """
+
+        super().__init__(length, self._get_item, **kwargs)
+        self.get_page = get_page
+        self.page_size = page_size
+        self.pages = pages
+        self._pages = collections.OrderedDict()
+
+    def _get_item(self, index):
+        page, pos = divmod(index, self.page_size)
+        with self._lock:
+            data = self._pages.get(page)
+            if data is not None:
+                self._pages.move_to_end(page)
+        if data is None:
+            data = list(self.get_page(page))
+            with self._lock:
+                self._pages[page] = data
+                while len(self._pages) > self.pages:
+                    self._pages.popitem(last=False)
+        return data[pos]
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+        super().clear()
 
 
 class App():
 
-    def __init__(self, menu=None):
+    def __init__(self, menu=None, frame_cache_size=FRAME_CACHE_SIZE, screens=None, stats=None):
+        # Instrumentation, see lcd_stats. Off if None
+        self.stats = stats
+        # Held while the widget tree is modified or rendered
+        self.lock = threading.RLock()
+        # Called without argument when the displayed state may have changed,
+        # by events or by changes made straight to the current screen
+        self.listeners = []
+        # Calls waiting for the thread running process: (fct, args)
+        self._calls = collections.deque()
+        # Queue read by process, woken up by call_soon
+        self._events = None
+        # Screens left by push, most recent last
+        self.history = []
+        # Last frame of recent screens: id: [screen, version, FrameBuffer]
+        self.frame_cache_size = frame_cache_size
+        self._frames = collections.OrderedDict()
+        # Size classes rendered besides the screen size, see frames
+        self._sizes = set()
+        # Show the cached frame of a screen just navigated to, even outdated
+        self._navigated = False
+        # Screens by name, like lcd_loader.Screens. Lets menu, above and
+        # below be given as names.
+        self.screens = screens
         self.menu = menu
         self.selected = menu
 
@@ -166,6 +791,298 @@ class App():
     def __str__(self):
         return str(self.menu)
 
+    @property
+    def menu(self):
+        return self._menu
+
+    @menu.setter
+    def menu(self, menu):
+        previous = getattr(self, '_menu', None)
+        if previous is not None and previous._owner is self:
+            previous._owner = None
+        menu = self.screen(menu)
+        if isinstance(menu, Box) and menu._parent is None and menu._owner is None:
+            # Invalidations of the screen reach the app, see invalidate
+            menu._owner = self
+        self._menu = menu
+        self.changed()
+
+    def invalidate(self, child=None):
+        """Called by the current screen when it or one of its boxes changed,
+        like a label whose text was set outside of any event
+
+        Parameters:
+            child (Box): Screen
+        """
+
+        if child is self._menu:
+            self.changed()
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats):
+        # Renders of every box are counted by the last instrumented app.
+        # An app without stats leaves the counting of another one on.
+        previous = getattr(self, '_stats', None)
+        self._stats = stats
+        if stats is not None:
+            Box.stats = stats
+        elif previous is not None and Box.stats is previous:
+            Box.stats = None
+
+    def screen(self, screen):
+        """Screen of a name from self.screens, or screen itself"""
+
+        if isinstance(screen, str):
+            return self.screens[screen]
+        return screen
+
+    def changed(self):
+        for listener in self.listeners:
+            listener()
+
+    def frame(self, size=None):
+        """Rendered current screen. A screen navigated back to shows its
+        cached frame at once, a fresh one follows if it changed meanwhile.
+
+        Parameters:
+            size (list): List of int [width, height] Size class rendered,
+                see frames. Screen size if None
+
+        Returns:
+            FrameBuffer:
+        """
+
+        return self.frames([size])[_size_key(size)]
+
+    def frames(self, sizes):
+        """Rendered current screen for each size class of a set of
+        displays. The screen is rendered once per distinct size.
+
+        A size class other than the screen size is laid out at that size,
+        the boxes of the screen are sized after it. The layout of the
+        screen size is resolved again afterwards, so every render of
+        another class costs a walk through the boxes of the screen.
+
+        Parameters:
+            sizes (list): list of [width, height], None for the screen size
+
+        Returns:
+            dict: size as tuple, or None: FrameBuffer
+        """
+
+        stats = self._stats
+        if stats is not None:
+            with stats.record('frame'):
+                frames, refresh = self._frames_of(sizes, stats)
+        else:
+            frames, refresh = self._frames_of(sizes)
+        if refresh:
+            self.changed()
+        return frames
+
+    def _frames_of(self, sizes, stats=None):
+        frames = {}
+        refresh = False
+        with self.lock:
+            screen = self.menu
+            navigated, self._navigated = self._navigated, False
+            for size in sizes:
+                key = _size_key(size)
+                if key in frames:
+                    continue
+                # The class of the screen size uses the render cache of the screen
+                rendered = None if key is None or list(key) == screen.size else key
+                if rendered not in frames:
+                    frames[rendered], outdated = self._frame(screen, rendered, navigated, stats)
+                    refresh = refresh or outdated
+                frames[key] = frames[rendered]
+        return frames, refresh
+
+    def _frame(self, screen, size, navigated, stats):
+        """
+        Returns:
+            list: [FrameBuffer, True if the frame is an outdated one]
+        """
+
+        key = id(screen) if size is None else (id(screen), size)
+        entry = self._frames.get(key)
+        if entry is not None and entry[0] is screen:
+            self._frames.move_to_end(key)
+            if entry[1] == screen.version:
+                if stats is not None:
+                    stats.count('frame_cache_hit')
+                return [entry[2], False]
+            if navigated:
+                if stats is not None:
+                    stats.count('frame_cache_stale')
+                return [entry[2], True]
+        if stats is not None:
+            stats.count('frame_cache_miss')
+            # Sizes are resolved as the render reads them
+            Box.layout_time = 0.0
+            start = time.perf_counter()
+        if size is None:
+            frame = screen.frame()
+        else:
+            frame = self._render_class(screen, list(size))
+        if stats is not None:
+            layout = Box.layout_time
+            stats.phase('layout', layout)
+            stats.phase('render', time.perf_counter() - start - layout)
+        self._frames[key] = [screen, screen.version, frame]
+        if size is not None:
+            self._sizes.add(size)
+        # Recent screens are kept for each size class
+        while len(self._frames) > self.frame_cache_size * (1 + len(self._sizes)):
+            self._frames.popitem(last=False)
+        return [frame, False]
+
+    @staticmethod
+    def _render_class(screen, size):
+        """Render of a screen laid out at another size. The screen keeps
+        its size and its version, other size classes are not kept in the
+        box cache."""
+
+        kept = [screen._size, screen._auto_size]
+        screen._size = size
+        screen._auto_size = False
+        screen.relayout()
+        try:
+            screen.refresh()
+            return screen.render(size)
+        finally:
+            screen._size, screen._auto_size = kept
+            screen.relayout()
+
+    def push(self, screen):
+        """Show a screen, the current one is kept for back()"""
+
+        with self.lock:
+            if self.menu is not None:
+                self.history.append(self.menu)
+            self._navigated = True
+            self.menu = screen
+
+    def back(self):
+        """Show the screen shown before the last push
+
+        Returns:
+            Box: New current screen, None if there is no history
+        """
+
+        with self.lock:
+            if not self.history:
+                return None
+            self._navigated = True
+            self.menu = self.history.pop()
+            return self.menu
+
+    def go_below(self, screen=None):
+        """Push the screen below the current one, or screen
+
+        Returns:
+            Box: New current screen, None if there is nothing below
+        """
+
+        with self.lock:
+            below = self.screen(screen if screen is not None else self.menu.below)
+            if below is None:
+                return None
+            self.push(below)
+            return below
+
+    def go_above(self, screen=None):
+        """Show the screen above the current one, or screen. Goes back
+        when it is the previous screen, otherwise replaces the current one.
+
+        Returns:
+            Box: New current screen, None if there is nothing above
+        """
+
+        with self.lock:
+            above = self.screen(screen if screen is not None else self.menu.above)
+            if above is None:
+                return None
+            if self.history and self.history[-1] is above:
+                return self.back()
+            self._navigated = True
+            self.menu = above
+            return above
+
+    def layout(self):
+        """Resolve every size of the displayed tree ahead of rendering"""
+
+        with self.lock:
+            self.menu.layout()
+
+    def handle(self, trigger):
+        stats = self._stats
+        if stats is not None:
+            with stats.record('event'):
+                start = time.perf_counter()
+                self._handle(trigger)
+                stats.phase('handle', time.perf_counter() - start)
+        else:
+            self._handle(trigger)
+        self.changed()
+
+    def _handle(self, trigger):
+        with self.lock:
+            # Background actions started by the trigger report to this app
+            _dispatch.app = self
+            try:
+                self.menu.check_do(trigger)
+            finally:
+                _dispatch.app = None
+
+    def process(self, events, timeout=None):
+        """Handle the next event of a queue. Blocks until one is available,
+        running the calls queued by call_soon meanwhile.
+
+        Parameters:
+            events (queue.Queue): Events with an id used as trigger
+            timeout (float): Seconds to wait. Forever if None
+
+        Returns:
+            object: Handled event
+        """
+
+        self._events = events
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.run_calls()
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            event = events.get(timeout=remaining)
+            if event is not _WAKE:
+                break
+        self.run_calls()
+        self.handle(event.id)
+        return event
+
+    def call_soon(self, fct, *args):
+        """Run fct(*args) under the lock on the thread running process,
+        before it handles its next event. From any thread."""
+
+        self._calls.append((fct, args))
+        events = self._events
+        if events is not None:
+            events.put(_WAKE)
+
+    def run_calls(self):
+        """Run the calls queued by call_soon"""
+
+        if not self._calls:
+            return
+        with self.lock:
+            while self._calls:
+                fct, args = self._calls.popleft()
+                fct(*args)
+        self.changed()
+
     def cursor(self):
         return self.menu.cursor_display(pos=True)
 
@@ -203,66 +1120,449 @@ class App():
 
 class Action():
 
-    def __init__(self, action, triggers=[], args=(), kwargs={}):
+    # Bumped when the triggers or the priority of any action change, see
+    # ActionReady
+    _triggers_epoch = 0
+    # Pool of the background actions, created on first use
+    executor = None
+
+    def __init__(self, action, triggers=(), args=(), kwargs=None, priority=0, stop=False,
+                 background=False, done=None, progress=None):
+        """
+        Parameters:
+            action (function): Called with args, kwargs and the call arguments
+            triggers (iterable): Triggers running the action
+            args (tuple): Positional arguments added to each call
+            kwargs (dict): Keyword arguments added to each call
+            priority (int): Actions of higher priority run first
+            stop (bool): Skip the remaining actions of the trigger once run
+            background (bool): Run on a worker thread. The action gets its
+                Job as 'job' keyword argument and may be a coroutine
+                function.
+            done (function): Called with the Job once a background action
+                ended, under the App lock, by the thread running
+                App.process
+            progress (ProgressBar): Widget following the background job
+        """
+
         self.triggers = triggers
         self.action = action
         self.args = args
-        self.kwargs = kwargs
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.priority = priority
+        self.stop = stop
+        self.background = background
+        self.done = done
+        self.progress = progress
+
+    @property
+    def triggers(self):
+        return self._triggers
+
+    @triggers.setter
+    def triggers(self, triggers):
+        self._triggers = frozenset(triggers)
+        Action._triggers_epoch += 1
+
+    @property
+    def priority(self):
+        return self._priority
+
+    @priority.setter
+    def priority(self, priority):
+        self._priority = priority
+        Action._triggers_epoch += 1
+
+    def do(self, *args, **kwargs):
+        """Run the action
+
+        Returns:
+            object: Action result, or its Job when running in background
+        """
+
+        args += self.args
+        call_kwargs = dict(kwargs)
+        call_kwargs.update(self.kwargs)
+        if self.background:
+            return self.submit(args, call_kwargs)
+        return self.action(*args, **call_kwargs)
+
+    def submit(self, args, kwargs):
+        """Start the action on the worker pool
+
+        Returns:
+            Job:
+        """
+
+        job = Job(self.action, args, kwargs, app=getattr(_dispatch, 'app', None))
+        if self.done is not None:
+            job.callbacks.append(self.done)
+        if self.progress is not None:
+            self.progress.job = job
+        if Action.executor is None:
+            Action.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=BACKGROUND_WORKERS, thread_name_prefix='lcd-action')
+        job.future = Action.executor.submit(job.run)
+        return job
+
+    def check(self, trigger):
+        if trigger in self._triggers:
+            return True
+
+    def check_do(self, *args, **kwargs):
+        if self.check(kwargs['trigger']):
+            self.do(*args, **kwargs)
+
+
+
+class Job():
+    """Background run of an action.
+
+    Progress and completion are published under the App lock, then the App
+    listeners are told, so widgets are only modified while the UI thread
+    is not using them.
+    """
+
+    def __init__(self, fct, args=(), kwargs=None, app=None):
+        """
+        Parameters:
+            fct (function): Function or coroutine function to run
+            args (tuple): Positional arguments
+            kwargs (dict): Keyword arguments, 'job' is added
+            app (App): Locked and notified on changes. Own lock if None
+        """
+
+        self.fct = fct
+        self.args = args
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.app = app
+        self.lock = app.lock if app is not None else threading.RLock()
+        self.state = JOB_PENDING
+        # Between 0 and 1, None if unknown
+        self.progress = None
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.future = None
+        self._cancelled = False
+        # Called with the job once ended
+        self.callbacks = []
+        # Called with the job on every change
+        self.watchers = []
+
+    @property
+    def running(self):
+        return self.state in (JOB_PENDING, JOB_RUNNING)
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Ask the action to stop. The action checks job.cancelled.
+        A job not started yet never runs and ends at once."""
+
+        self._cancelled = True
+        if self.future is not None and self.future.cancel():
+            self._publish(JOB_CANCELLED)
+
+    def run(self):
+        self._publish(JOB_RUNNING)
+        try:
+            result = self.fct(*self.args, job=self, **self.kwargs)
+            if asyncio.iscoroutine(result):
+                result = asyncio.run(result)
+        except Exception as error:
+            self.error = error
+            self._publish(JOB_FAILED)
+        else:
+            self.result = result
+            self._publish(JOB_DONE)
+        return self.result
+
+    def set_progress(self, progress, message=None):
+        """Report progress from the action
+
+        Parameters:
+            progress (float): Between 0 and 1, None if unknown
+            message (str): Replaces the message if given
+        """
+
+        with self.lock:
+            self.progress = progress
+            if message is not None:
+                self.message = message
+        self._publish()
+
+    def _publish(self, state=None):
+        with self.lock:
+            if state is not None:
+                self.state = state
+            for watcher in list(self.watchers):
+                watcher(self)
+            if not self.running and self.app is None:
+                for callback in self.callbacks:
+                    callback(self)
+        if self.app is not None:
+            if not self.running:
+                # Completion callbacks run on the UI thread
+                for callback in self.callbacks:
+                    self.app.call_soon(callback, self)
+            self.app.changed()
+
+
+class Box():
+
+    # Widgets are created by thousands for long lists, no instance __dict__.
+    # Subclasses without __slots__ get one back.
+    __slots__ = ('_cache', 'version', '_layout', '_owner', '_txt', '_size',
+                 '_auto_size', '_align', '_offset', '_loop', '_parent',
+                 'above', 'below', '_under', 'cursor', '_cursor_pos', '_marquee')
+
+    # Keep the rendered buffer along with the text, for boxes drawn into
+    # their parent rather than read as text
+    _keep_frame = False
+    # Counts renders and times size resolution when set, see App.stats
+    stats = None
+    # Seconds spent resolving sizes while stats are on
+    layout_time = 0.0
+    # True while a size is resolved, nested resolutions are timed with it
+    _resolving = False
+
+    def __init__(self, txt='', size=[0,0], above=None, under=None, cursor=True, cursor_pos=[0,0] ,auto_size=True, align=[ALIGN_CENTER, ALIGN_CENTER], loop=False, offset=[0,0], parent=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Render cache: [size, str, FrameBuffer or None, lines or None],
+        # None when dirty
+        self._cache = None
+        self.version = 0
+        # Layout: (size, content size), None until resolved, see Box.relayout
+        self._layout = None
+        self._owner = None
+        self._txt = txt
+        self._size = size
+        self._auto_size = auto_size
+        self._align = align
+        self._offset = offset
+        self._loop = loop
+        # A new box is not displayed yet, nothing to invalidate
+        self._parent = parent
+        self.above = above
+        self.below = None
+        self._under = under
+        self.cursor = cursor
+        self._cursor_pos = cursor_pos
+        self._marquee = None
+
+    def __str__(self):
+        self.refresh()
+        return self.txt
+
+    def refresh(self):
+        """Update the text of boxes showing another box, like a button
+        showing its label, before it is rendered"""
+
+        pass
+
+    def draw(self, view, pos=[0, 0]):
+        """Draw the content into a region of a parent buffer
+
+        Parameters:
+            view (FrameView): Destination
+            pos (list): List of int [x, y] Position in view
+        """
+
+        self.refresh()
+        # Rendered again first if outdated
+        self.txt
+        frame = self._cache[2]
+        origin = view.origin
+        pos = [origin[0] + pos[0], origin[1] + pos[1]]
+        if frame is not None:
+            view.buffer.blit(frame, pos, view.clip)
+        else:
+            # Boxes read as text keep no buffer, copy the text itself
+            view.buffer.blit_lines(self.lines(), pos, view.clip)
+
+    def lines(self):
+        """Rendered content as lines. Split once per render and kept
+        with it, as a box is drawn again at every render of its parent.
+
+        Returns:
+            tuple: tuple of str
+        """
+
+        txt = self.txt
+        cache = self._cache
+        lines = cache[3]
+        if lines is None:
+            lines = cache[3] = tuple(txt.split('\n'))
+        return lines
+
+    def extent(self):
+        """Size of what draw paints
+
+        Returns:
+            list: List of int [width, height]
+        """
+
+        return self.size
+
+    def invalidate(self, child=None):
+        """Drop the cached render of this box and of every box displaying it
+
+        Parameters:
+            child (Box): Displayed box at the origin of the change, if any
+        """
+
+        self._cache = None
+        self.version += 1
+        parent = self._parent if self._parent is not None else self._owner
+        if parent is not None:
+            parent.invalidate(self)
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @parent.setter
+    def parent(self, parent):
+        if parent is not self._parent:
+            self._parent = parent
+            self.relayout()
+            self.invalidate()
+
+    def relayout(self):
+        """Drop the resolved size of this box and of the boxes sized after
+        it, the boxes it displays. They are resolved again the next time
+        they are read. Sizes of other boxes are kept."""
+
+        self._layout = None
+        for child in self.children():
+            child.relayout()
+
+    def layout(self):
+        """Resolve the size of this box and of the boxes it displays.
+        Sizes are then read from the stored layout until it changes.
+        """
+
+        self.resolve()
+        for child in self.children():
+            child.layout()
+
+    def resolve(self):
+        """Stored layout of the box, resolved again if outdated
+
+        Returns:
+            tuple: (size, content size)
+        """
+
+        layout = self._layout
+        if layout is None:
+            if Box.stats is not None and not Box._resolving:
+                Box._resolving = True
+                start = time.perf_counter()
+                try:
+                    layout = self._layout = (self.measure(), string_size(str(self._txt)))
+                finally:
+                    Box._resolving = False
+                    Box.layout_time += time.perf_counter() - start
+            else:
+                layout = self._layout = (self.measure(), string_size(str(self._txt)))
+        return layout
 
-    def do(self, *args, **kwargs):
-        args += self.args
-        kwargs.update(self.kwargs)
-        return self.action(*args, **kwargs)
+    def measure(self):
+        """Size of the box from its settings and its parent
 
-    def check(self, trigger):
-        if trigger in self.triggers:
-            return True
+        Returns:
+            list: List of int [width, height]
+        """
 
-    def check_do(self, *args, **kwargs):
-        if self.check(kwargs['trigger']):
-            self.do(*args, **kwargs)
+        if self.auto_size:
+            if self._parent is not None:
+                return self._parent.item_size_request(self)
+            if isinstance(self._txt, str):
+                return string_size(self._txt)
+        return self._size
 
+    def item_size_request(self, item):
+        """Size given to a box displayed inside this one"""
 
+        return self.size
 
-class Box():
-    def __init__(self, txt='', size=[0,0], above=None, under=None, cursor=True, cursor_pos=[0,0] ,auto_size=True, align=[ALIGN_CENTER, ALIGN_CENTER], loop=False, offset=[0,0], parent=None, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._txt = txt
-        self._size = size
-        self.auto_size = auto_size
-        self.align = align
-        self.offset = offset
-        self.loop = loop
-        self.parent = parent
-        self.above = above
-        self._under = under
-        self.cursor = cursor
-        self._cursor_pos = cursor_pos
+    def children(self):
+        """Boxes displayed by this one
 
-    def __str__(self):
-        return self.txt
+        Returns:
+            list: list of Box
+        """
+
+        return []
 
     @property
     def size(self):
-        if self.auto_size:
-            try:
-                try:
-                    return self.parent.item_size_request(self)
-                    #print('Size: Request')
-                except:
-                    #print('Size: Parent')
-                    return self.parent.size
-            except:
-                try:
-                    #print('Size: Self')
-                    return string_size(self._txt)
-                except:
-                    pass
-        return self._size
+        layout = self._layout
+        if layout is None:
+            layout = self.resolve()
+        return layout[0]
 
     @size.setter
     def size(self, size):
         self._size = size
+        self.relayout()
+        self.invalidate()
+
+    @property
+    def auto_size(self):
+        return self._auto_size
+
+    @auto_size.setter
+    def auto_size(self, auto_size):
+        self._auto_size = auto_size
+        self.relayout()
+        self.invalidate()
+
+    @property
+    def align(self):
+        return self._align
+
+    @align.setter
+    def align(self, align):
+        self._align = align
+        self.invalidate()
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @offset.setter
+    def offset(self, offset):
+        self._offset = offset
+        self.invalidate()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    @loop.setter
+    def loop(self, loop):
+        self._loop = loop
+        self.invalidate()
+
+    @property
+    def marquee(self):
+        return self._marquee
+
+    @marquee.setter
+    def marquee(self, marquee):
+        """Scroll the content with a Marquee, or stop scrolling if None"""
+
+        if self._marquee is not None:
+            self._marquee.box = None
+        self._marquee = marquee
+        if marquee is not None:
+            marquee.box = self
+            marquee.restart()
+        self.invalidate()
 
     @property
     def under(self):
@@ -275,11 +1575,45 @@ class Box():
 
     @property
     def txt(self):
-        return string_align_move(str(self._txt), self.size, [-self.offset[0], -self.offset[1]], self.align, self.loop)
+        size = self.size
+        cache = self._cache
+        if cache is None or cache[0] != size:
+            if Box.stats is not None:
+                Box.stats.count('renders')
+            frame = self.render(size)
+            cache = self._cache = [list(size), str(frame), frame if self._keep_frame else None, None]
+        return cache[1]
 
     @txt.setter
     def txt(self, txt):
-        self._txt = txt
+        if txt != self._txt:
+            self._txt = txt
+            self.relayout()
+            self.invalidate()
+
+    def frame(self):
+        """Rendered content. Cached until invalidated or resized.
+        The returned buffer is shared and must not be modified.
+
+        Only the text is kept for boxes read as text, so the many items of
+        a long menu hold no buffer.
+
+        Returns:
+            FrameBuffer:
+        """
+
+        # Boxes showing another box take its text first, like str does
+        self.refresh()
+        txt = self.txt
+        cache = self._cache
+        if cache[2] is None:
+            cache[2] = FrameBuffer.from_string(txt)
+        return cache[2]
+
+    def render(self, size):
+        if self._marquee is not None:
+            return self._marquee.frame(size)
+        return frame_align_move(FrameBuffer.from_string(str(self._txt)), size, [-self.offset[0], -self.offset[1]], self.align, self.loop)
 
     @property
     def cursor_pos(self):
@@ -290,63 +1624,575 @@ class Box():
         self._cursor_pos = pos
 
     def bounds(self):
-        size = string_size(self._txt)
+        size = self.resolve()[1]
         bottom_right = [size[0]-1, size[1]-1]
         return self.process_pos([0,0], bottom_right)
 
     def process_pos(self, *pos):
+        """Move positions in the content the same way the content is moved
+
+        Parameters:
+            *pos (list): List of int [x, y]
+
+        Returns:
+            list: Moved position, or list of positions if more than one
+        """
+
+        layout = self.resolve()
+        size = layout[0]
+        align_offset = size_align_offset(layout[1], size, self.align)
         new_pos = []
         for p in pos:
-            new_pos.append(pos_align_move(p, self._txt, self.size, self.offset, self.align, self.loop))
-        return list(*new_pos)
+            offset = [self.offset[0] + align_offset[0] + p[0], self.offset[1] + align_offset[1] + p[1]]
+            if self.loop:
+                offset = get_loop_offset(offset, size)
+            new_pos.append(offset)
+        if len(new_pos) == 1:
+            return new_pos[0]
+        return new_pos
 
 
 
 class Label(Box):
 
+    __slots__ = ()
+
     def __init__(self, txt, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.txt = txt
+        # Not displayed yet, no layout to update
+        self._txt = txt
+
+
+class ProgressBar(Box):
+    """Progress of a Job, or a busy text while its progress is unknown"""
+
+    __slots__ = ('_job', 'fill', 'empty', 'busy', 'failed')
+
+    def __init__(self, job=None, fill='#', empty='-', busy='...', failed='Error', *args, **kwargs):
+        kwargs.setdefault('size', [10, 1])
+        kwargs.setdefault('auto_size', False)
+        super().__init__(*args, **kwargs)
+        self.fill = fill
+        self.empty = empty
+        self.busy = busy
+        self.failed = failed
+        self._job = None
+        self.job = job
+
+    @property
+    def job(self):
+        return self._job
+
+    @job.setter
+    def job(self, job):
+        if self._job is not None and self.job_changed in self._job.watchers:
+            self._job.watchers.remove(self.job_changed)
+        self._job = job
+        if job is not None:
+            job.watchers.append(self.job_changed)
+        self.invalidate()
+
+    def job_changed(self, job):
+        self.invalidate()
+
+    def render(self, size):
+        job = self._job
+        if job is None or job.state in (JOB_DONE, JOB_CANCELLED):
+            line = ''
+        elif job.state == JOB_FAILED:
+            line = self.failed
+        elif job.progress is None:
+            line = self.busy
+        else:
+            filled = int(round(min(max(job.progress, 0.0), 1.0) * size[0]))
+            line = self.fill * filled + self.empty * (size[0] - filled)
+        return frame_align_move(FrameBuffer.from_string(line), size, [0, 0], self.align, False)
+
+
+# Sizes a marquee keeps the windows of, like the size classes of displays
+MARQUEE_SIZES = 4
+
+
+class Marquee():
+    """Scrolling of a box content too long for its size.
+
+    Every window of the animation is computed once per text and size, the
+    windows of each size the box is shown at are kept. A tick only selects
+    the window of the current time and invalidates the box when it
+    differs, so the display gets the changed cells only.
+    """
+
+    def __init__(self, speed=4, direction=1, pause=1.0, gap=3, loop=True, orient=HORIZONTAL):
+        """
+        Parameters:
+            speed (float): Cells per second
+            direction (int): 1 to scroll the content towards the start,
+                -1 towards the end
+            pause (float): Seconds spent at the start, and at the end when
+                not looping
+            gap (int): Blank cells between the end and the start of the
+                content when looping
+            loop (bool): Scroll around continuously. Otherwise scroll to the
+                end then jump back to the start
+            orient (int): HORIZONTAL or VERTICAL scrolling
+        """
+
+        self.speed = speed
+        self.direction = direction
+        self.pause = pause
+        self.gap = gap
+        self.loop = loop
+        self.orient = orient
+        # Box displaying the animation, set by Box.marquee
+        self.box = None
+        # Box text of the computed windows
+        self._txt = None
+        # size as tuple: [windows, end time of each window within a cycle]
+        self._windows = {}
+        # Windows at the box size, followed by tick
+        self._frames = []
+        self._ends = []
+        self._step = 0
+        self._start = time.monotonic()
+        # Time of the last tick
+        self._now = None
+
+    def restart(self, now=None):
+        """Go back to the first window"""
+
+        self._start = time.monotonic() if now is None else now
+        self._step = 0
+
+    @property
+    def moving(self):
+        return len(self._frames) > 1
+
+    def windows(self, size):
+        """Windows of the animation at a size, computed unless already done
+        for the box text and size
+
+        Parameters:
+            size (list): List of int [width, height]
+
+        Returns:
+            list: [list of FrameBuffer, list of float end time of each
+                window within a cycle]
+        """
+
+        txt = str(self.box._txt)
+        if txt != self._txt:
+            if self._txt is not None:
+                # New content starts from its beginning
+                self.restart()
+            self._txt = txt
+            self._windows = {}
+        key = tuple(size)
+        windows = self._windows.get(key)
+        if windows is None:
+            if len(self._windows) >= MARQUEE_SIZES:
+                self._windows.clear()
+            windows = self._windows[key] = self._compute(txt, size)
+        return windows
+
+    def _compute(self, txt, size):
+        content = FrameBuffer.from_string(txt)
+        along = self.orient
+        length = content.size[along]
+        view = size[along]
+        align = list(self.box.align)
+        align[along] = ALIGN_LEFT
+
+        if length <= view:
+            return [[frame_align_move(content, size, [0, 0], self.box.align, False)], [1.0]]
+
+        if self.loop:
+            # Content, gap, then the start of the content again
+            period = length + self.gap
+            strip_size = list(content.size)
+            strip_size[along] = period + view
+            strip = FrameBuffer(strip_size)
+            pos = [0, 0]
+            strip.blit(content, pos)
+            pos[along] = period
+            strip.blit(content, pos)
+            shifts = list(range(period))
+        else:
+            strip = content
+            shifts = list(range(length - view + 1))
+        if self.direction < 0:
+            shifts = shifts[:1] + shifts[:0:-1] if self.loop else shifts[::-1]
+
+        step_time = 1.0 / self.speed
+        frames = []
+        ends = []
+        end = 0.0
+        for idx, shift in enumerate(shifts):
+            offset = [0, 0]
+            offset[along] = shift
+            frames.append(frame_align_move(strip, size, offset, align, False))
+            end += step_time
+            if idx == 0 or (not self.loop and idx == len(shifts) - 1):
+                end += self.pause
+            ends.append(end)
+        return [frames, ends]
+
+    def step_at(self, now, ends=None):
+        """
+        Parameters:
+            now (float): Time
+            ends (list): End times of the windows of a size, see windows.
+                Those at the box size if None
+
+        Returns:
+            int: Index of the window shown at time now
+        """
+
+        if ends is None:
+            ends = self._ends
+        if len(ends) < 2:
+            return 0
+        return bisect.bisect_right(ends, (now - self._start) % ends[-1])
+
+    def next_change(self, now):
+        """
+        Returns:
+            float: Time of the next window change, None if not moving
+        """
+
+        if len(self._frames) < 2:
+            return None
+        cycle = self._ends[-1]
+        elapsed = now - self._start
+        turns = elapsed // cycle
+        return self._start + turns * cycle + self._ends[self.step_at(now)]
+
+    def tick(self, now=None):
+        """Select the window of the current time
+
+        Returns:
+            bool: True if the box content changed
+        """
+
+        if self.box is None:
+            return False
+        self._now = time.monotonic() if now is None else now
+        self._frames, self._ends = self.windows(self.box.size)
+        step = self.step_at(self._now)
+        if step == self._step:
+            return False
+        self._step = step
+        self.box.invalidate()
+        return True
+
+    def frame(self, size):
+        """
+        Returns:
+            FrameBuffer: Window currently shown
+        """
+
+        frames, ends = self.windows(size)
+        if not self._frames:
+            # Not ticked yet, the first size shown is followed
+            self._frames, self._ends = frames, ends
+        if frames is self._frames:
+            return frames[self._step]
+        # Another size class, at the time of the last tick
+        return frames[self.step_at(self._now if self._now is not None else self._start, ends)]
+
+
+class Binding():
+    """Text of a box taken from a data source.
+
+    A callable source is polled every interval. An observable source, with
+    a subscribe(callback) method, pushes its values through set(). The box
+    is invalidated only when its text really changes.
+    """
+
+    def __init__(self, source, box=None, interval=1.0, fmt='{0}'):
+        """
+        Parameters:
+            source: Callable returning the value, or observable
+            box (Box): Box showing the value
+            interval (float): Seconds between polls of a callable source
+            fmt (str): Format of the value, given as {0}
+        """
+
+        self.source = source
+        self.box = box
+        self.interval = interval
+        self.fmt = fmt
+        # Due time of the next poll, None for pushed values
+        self._next = 0.0 if callable(source) else None
+        self._pushed = []
+        # Guards _pushed, set is called from any thread
+        self._lock = threading.Lock()
+        # Called when a value is pushed, set by Animator.add
+        self.wake = None
+        if hasattr(source, 'subscribe'):
+            source.subscribe(self.set)
+
+    def set(self, value):
+        """Push a new value, from any thread"""
+
+        with self._lock:
+            self._pushed.append(value)
+        if self.wake is not None:
+            self.wake()
+
+    def tick(self, now=None):
+        """Poll the source when due and show the latest value
+
+        Returns:
+            bool: True if the box content changed
+        """
+
+        if now is None:
+            now = time.monotonic()
+        value = None
+        has_value = False
+        if self._pushed:
+            # Swapped so a value pushed meanwhile is kept for the next tick
+            with self._lock:
+                pushed, self._pushed = self._pushed, []
+            value = pushed[-1]
+            has_value = True
+        if self._next is not None and now >= self._next:
+            value = self.source()
+            has_value = True
+            self._next = now + self.interval
+        if not has_value or self.box is None:
+            return False
+        return self.show(self.fmt.format(value))
+
+    def show(self, txt):
+        box = self.box
+        if txt == box._txt:
+            return False
+        box._txt = txt
+        box.relayout()
+        box.invalidate()
+        return True
+
+    def next_change(self, now):
+        """
+        Returns:
+            float: Time of the next poll, None for pushed values
+        """
+
+        return self._next
+
+
+class Animator():
+    """Ticks marquees and bindings from a background thread.
+
+    Only those of boxes on the current screen of the App are ticked. The
+    thread sleeps until the next window change or poll, so static labels
+    and hidden screens cost nothing.
+    """
+
+    def __init__(self, app=None, max_rate=50):
+        """
+        Parameters:
+            app (App): Locked while ticking and notified of changes
+            max_rate (float): Maximum ticks per second
+        """
+
+        self.app = app
+        self.max_rate = max_rate
+        # Marquee and Binding objects
+        self.animated = []
+        self._lock = app.lock if app is not None else threading.RLock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._screen = None
+        if app is not None:
+            app.listeners.append(self.screen_changed)
+
+    def add(self, animated):
+        if isinstance(animated, Binding):
+            animated.wake = self._wake.set
+        self.animated.append(animated)
+        self._wake.set()
+
+    def remove(self, animated):
+        self.animated.remove(animated)
+
+    def screen_changed(self):
+        if self.app.menu is not self._screen:
+            self._wake.set()
+
+    def visible(self, box):
+        """
+        Returns:
+            bool: True if box is part of the current screen
+        """
+
+        if self.app is None:
+            return True
+        while box is not None:
+            if box is self._screen:
+                return True
+            box = box._parent if box._parent is not None else box._owner
+        return False
+
+    def tick(self, now=None):
+        """Advance every visible marquee and binding
+
+        Returns:
+            float: Time of the next change, None if nothing moves
+        """
+
+        if now is None:
+            now = time.monotonic()
+        changed = False
+        next_change = None
+        with self._lock:
+            if self.app is not None:
+                self._screen = self.app.menu
+            for animated in list(self.animated):
+                if not self.visible(animated.box):
+                    continue
+                changed = animated.tick(now) or changed
+                change = animated.next_change(now)
+                if change is not None and (next_change is None or change < next_change):
+                    next_change = change
+        if changed and self.app is not None:
+            self.app.changed()
+        return next_change
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='lcd-animator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            self._wake.clear()
+            next_change = self.tick()
+            if next_change is None:
+                # Nothing moves, wait for a new one or another screen
+                self._wake.wait()
+                continue
+            delay = max(next_change - time.monotonic(), 1.0 / self.max_rate)
+            self._wake.wait(delay)
 
 
 class ActionReady():
 
-    def __init__(self, actions=[], *args, **kwargs):
+    # Mixin, the concrete class declares the '_actions' and '_action_index'
+    # slots
+    __slots__ = ()
+
+    def __init__(self, actions=(), *args, **kwargs):
         #super().__init__(*args, **kwargs)
         self.actions = actions
 
+    @property
+    def actions(self):
+        return self._actions
+
+    @actions.setter
+    def actions(self, actions):
+        # Copied so that actions are only changed by assigning them, the
+        # default empty tuple stays shared by every widget
+        self._actions = tuple(actions)
+        self._action_index = None
+
+    def action_index(self):
+        """Actions of each trigger, by decreasing priority. Built again when
+        actions are assigned, or when the triggers or the priority of an
+        action change.
+
+        Returns:
+            dict: trigger: list of Action
+        """
+
+        index = self._action_index
+        if index is None or index[0] != Action._triggers_epoch:
+            by_trigger = {}
+            for action in sorted(self._actions, key=lambda action: -action.priority):
+                for trigger in action.triggers:
+                    by_trigger.setdefault(trigger, []).append(action)
+            index = self._action_index = (Action._triggers_epoch, by_trigger)
+        return index[1]
+
     def check(self, trigger):
-        for action in self.actions:
-            if action.check(trigger):
-                return True
-        return False
+        return trigger in self.action_index()
 
     def do(self):
         for action in self.actions:
             action.do(menu=self, )
 
     def check_do(self, trigger=None):
-        for action in self.actions:
-            action.check_do(trigger=trigger, menu=self)
+        """Run the actions of a trigger
+
+        Returns:
+            bool: True if an action ran
+        """
+
+        actions = self.action_index().get(trigger)
+        if not actions:
+            return False
+        for action in actions:
+            action.do(trigger=trigger, menu=self)
+            if action.stop:
+                break
+        return True
 
 
 class PushButton(Box, ActionReady):
 
+    __slots__ = ('label', '_actions', '_action_index')
+
     def __init__(self, label='', *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.set_label(label)
 
-    def __str__(self):
+    def refresh(self):
         self.txt = str(self.label)
-        return self.txt
+
+    def invalidate(self, child=None):
+        if child is not None and child is self.label:
+            # Measured again with the new label text, see resolve
+            self._layout = None
+        super().invalidate(child)
+
+    def resolve(self):
+        if self._layout is None:
+            # Parents measure the button before drawing it, its text must
+            # follow the label by then. Invalidation already went up.
+            self._txt = str(self.label)
+        return super().resolve()
+
+    def children(self):
+        return [self.label]
 
     def set_label(self, label):
         if isinstance(label, Label):
             self.label = label
         else:
             self.label = Label(label)
+        # Label changes must reach whatever displays this button
+        self.label._owner = self
+        # Text known before the first render so the button can be measured
+        self.txt = str(self.label)
+        self.invalidate()
 
 class Items():
+
+    # Mixin, the concrete class declares the '_items' and '_index' slots
+    __slots__ = ()
+
     def __init__(self, items=[], index=0, loop=False, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._items = []
@@ -357,33 +2203,50 @@ class Items():
     @property
     def index(self):
         if self.loop:
-            return self._index % len(self.items)
+            return self._index % len(self._items)
         else:
-            return max(min(self._index, len(self.items)-1), 0)
+            return max(min(self._index, len(self._items)-1), 0)
 
     @index.setter
     def index(self, index):
         self._index = index
         self.update_offset()
+        self.invalidate()
+        if isinstance(self._items, ItemProvider):
+            self._items.prefetch(self.index)
 
 
     @property
     def items(self):
-        for item in self._items:
-            item.parent = self
         return self._items
 
     @items.setter
     def items(self, items):
         #self._items = items
-        new_items = []
-        for item in items:
-            if isinstance(item, Box):
+        if isinstance(self._items, ItemProvider) and self._items is not items:
+            # Detached, its prefetch thread is not needed anymore
+            self._items.stop()
+        if isinstance(items, ItemProvider):
+            items.parent = self
+            self._items = items
+        else:
+            new_items = []
+            for item in items:
+                if not isinstance(item, Box):
+                    item = Label(item)
+                item.parent = self
                 new_items.append(item)
-            else:
-                new_item.append(Label(label))
-            item.parent = self
-        self._items = new_items
+            self._items = new_items
+        self.items_changed()
+        self.invalidate()
+
+    def items_changed(self):
+        pass
+
+    def children(self):
+        if isinstance(self._items, ItemProvider):
+            return self._items.materialized()
+        return list(self._items)
 
     def update_offset(self):
         pass
@@ -393,7 +2256,7 @@ class Items():
         return self.index
 
     def last(self):
-        self.index = len(self.items)-1
+        self.index = len(self._items)-1
         return self.index
 
     def next(self):
@@ -405,53 +2268,388 @@ class Items():
         return self.index
 
     def select_item(self, item):
-        self.index = self.items.find(item)
+        self.index = self._items.index(item)
 
     def selected_item(self):
-        return self.items[self.index]
+        return self._items[self.index]
 
 
 class ItemsMenu(Items, Box, ActionReady):
 
-    def __init__(self, *args, orient=VERTICAL, div=Label(''), loop_div=Label(''), **kwargs):
+    __slots__ = ('_items', '_index', '_actions', '_action_index', '_orient',
+                 '_div', '_loop_div', '_virtual', '_size_index', '_indexed_items',
+                 '_indexed_count', '_item_positions', '_changed_items', '_cross_sizes',
+                 '_cross_counts', '_extent')
+
+    # Drawn into parent menus by copying its cached buffer
+    _keep_frame = True
+
+    def __init__(self, *args, orient=VERTICAL, div='', loop_div='', virtual=False, **kwargs):
+        # Lengths of items and dividers along the orientation axis
+        self._size_index = None
+        self._div = None
+        self._loop_div = None
+        # Content size: (version, size, extent)
+        self._extent = None
         super().__init__(*args, **kwargs)
         self.orient = orient
-        self._div = div
-        self._loop_div = loop_div
+        self.div = div
+        self.loop_div = loop_div
+        # Render only the items in view, output is cropped to self.size.
+        # Always the case for items from an ItemProvider.
+        self.virtual = virtual
+
+    @property
+    def virtual(self):
+        return self._virtual
 
+    @virtual.setter
+    def virtual(self, virtual):
+        self._virtual = virtual
+        self.invalidate()
 
     @property
-    def txt(self):
-        txt = str(self._orient_items(
-                                    self.items,
-                                    self.size,
-                                    self.orient,
-                                    self.loop,
-                                    self.align,
-                                    self.div,
-                                    self.loop_div))
-        return string_align_move(txt, string_size(txt), self.offset, self.align, self.loop)
+    def orient(self):
+        return self._orient
+
+    @orient.setter
+    def orient(self, orient):
+        self._orient = orient
+        self._size_index = None
+        # Items are sized after the orientation
+        self.relayout()
+        self.invalidate()
+
+    def items_changed(self):
+        self._size_index = None
+
+    def relayout(self):
+        super().relayout()
+        # Item lengths are measured again with the new item sizes
+        self._size_index = None
+        # Dividers are sized after the menu too
+        for div in (self._div, self._loop_div):
+            if div is not None:
+                div.relayout()
+
+    def invalidate(self, child=None):
+        if child is not None and self._size_index is not None:
+            if child is self._div:
+                self._size_index = None
+            else:
+                # Only the length of that item needs to be refreshed
+                position = self._item_positions.get(id(child))
+                if position is not None:
+                    self._changed_items.add(position)
+        super().invalidate(child)
+
+    def div_shown(self):
+        return len(self.div._txt) > 0
+
+    def entry_index(self, index):
+        """Position of an item among items and dividers
+
+        Parameters:
+            index (int): Item index
+
+        Returns:
+            int:
+        """
+
+        if self.div_shown():
+            return index * 2
+        return index
+
+    def entry(self, index):
+        """Item or divider at a position among items and dividers"""
+
+        if self.div_shown():
+            if index % 2:
+                return self.div
+            return self._items[index // 2]
+        return self._items[index]
+
+    def size_index(self):
+        """Lengths of items and dividers along the orientation axis.
+        Built once, then updated for the items that changed, along with
+        the item lengths across the axis.
+
+        Returns:
+            SizeIndex:
+        """
+
+        along = int(self.orient == VERTICAL)
+        across = 1 - along
+        items = self._items
+        size_index = self._size_index
+        if size_index is None or self._indexed_items is not items or \
+                self._indexed_count != len(items):
+            div = self.div
+            div_length = div.size[along] if len(div._txt) > 0 else None
+            self._item_positions = {}
+            # Item lengths across the axis, and how many items have each
+            self._cross_sizes = []
+            self._cross_counts = collections.Counter()
+            if isinstance(items, ItemProvider):
+                size_index = items.size_index(div_length)
+            else:
+                lengths = []
+                for idx, item in enumerate(items):
+                    item.parent = self
+                    if idx and div_length is not None:
+                        lengths.append(div_length)
+                    size = item.size
+                    lengths.append(size[along])
+                    self._cross_sizes.append(size[across])
+                    self._item_positions[id(item)] = idx
+                self._cross_counts.update(self._cross_sizes)
+                size_index = SizeIndex(lengths)
+            self._size_index = size_index
+            self._indexed_items = items
+            self._indexed_count = len(items)
+            self._changed_items = set()
+        elif self._changed_items:
+            cross_sizes = self._cross_sizes
+            cross_counts = self._cross_counts
+            for idx in self._changed_items:
+                size = self._items[idx].size
+                size_index.update(self.entry_index(idx), size[along])
+                old = cross_sizes[idx]
+                if old != size[across]:
+                    cross_counts[old] -= 1
+                    if not cross_counts[old]:
+                        del cross_counts[old]
+                    cross_counts[size[across]] += 1
+                    cross_sizes[idx] = size[across]
+            self._changed_items = set()
+        return size_index
+
+    def is_looping(self, size=None):
+        """True if looping is on and the content does not fit in size.
+        Same result as needs_loop, in O(1).
+
+        Parameters:
+            size (list): List of int [width, height]. Menu size if None
+
+        Returns:
+            bool:
+        """
+
+        if not self.loop:
+            return False
+        if size is None:
+            size = self.size
+        along = int(self.orient == VERTICAL)
+        return self.size_index().total > size[along]
+
+    def cross_length(self, size):
+        """Content size across the orientation axis
+
+        Parameters:
+            size (list): List of int [width, height] Menu size
+
+        Returns:
+            int:
+        """
+
+        if self.orient == HORIZONTAL:
+            return size[1]
+        self.size_index()
+        if isinstance(self._items, ItemProvider):
+            # Provided items are not all created, they get the menu width
+            width = size[0]
+        else:
+            # Widest item, kept up to date by size_index
+            width = max(self._cross_counts) if self._cross_counts else 0
+        if len(self._items) > 1 and self.div_shown():
+            width = max(width, self.div.size[0])
+        return width
+
+    def render(self, size):
+        if self.virtual or isinstance(self._items, ItemProvider):
+            return self.render_window(size)
+        placed = self.placed_entries(size)
+        frame = FrameBuffer(placed[1])
+        self.compose(FrameView(frame), placed)
+        return frame
+
+    def extent(self):
+        size = self.size
+        if self.virtual or isinstance(self._items, ItemProvider):
+            return size
+        # Item sizes only change along with the menu size or version
+        extent = self._extent
+        if extent is None or extent[0] != self.version or extent[1] != size:
+            extent = self._extent = (self.version, list(size), self.placed_entries(size)[1])
+        return extent[2]
+
+    def placed_entries(self, size):
+        """Items and dividers of the full content with their place along
+        the orientation axis. A nested menu takes the length of its whole
+        content.
+
+        Parameters:
+            size (list): List of int [width, height] Menu size
+
+        Returns:
+            list: [list of (entry, start, length, cross length), content size]
+        """
+
+        along = int(self.orient == VERTICAL)
+        cross = 1 - along
+        entries = []
+        div = self.div if self.div_shown() else None
+        if div is not None:
+            div_extent = div.extent()
+            div_length, div_cross = div_extent[along], div_extent[cross]
+        start = 0
+        cross_length = 0
+        for idx, item in enumerate(self._items):
+            if idx and div is not None:
+                entries.append((div, start, div_length, div_cross))
+                start += div_length
+                if div_cross > cross_length:
+                    cross_length = div_cross
+            extent = item.extent()
+            entries.append((item, start, extent[along], extent[cross]))
+            start += extent[along]
+            if extent[cross] > cross_length:
+                cross_length = extent[cross]
+        if self.is_looping(size) and len(self.loop_div._txt) > 0:
+            extent = self.loop_div.extent()
+            entries.append((self.loop_div, start, extent[along], extent[cross]))
+            start += extent[along]
+            cross_length = max(cross_length, extent[cross])
+        if along:
+            return [entries, [cross_length, start]]
+        # Rows of a horizontal menu are the menu rows
+        return [entries, [start, size[1]]]
+
+    def compose(self, view, placed):
+        """Draw every item and divider at its place, moved by offset
+
+        Parameters:
+            view (FrameView): Destination, of the content size
+            placed (list): Result of placed_entries
+        """
+
+        along = int(self.orient == VERTICAL)
+        cross = 1 - along
+        entries, content = placed
+        content_along, content_cross = content[along], content[cross]
+        shift_along, shift_cross = -self.offset[along], -self.offset[cross]
+        along_copies = (0, )
+        cross_positions = (shift_cross, )
+        if self.loop and content_along and content_cross:
+            # Content wraps around its own size
+            shift_along %= content_along
+            shift_cross %= content_cross
+            along_copies = (0, -content_along)
+            cross_positions = (shift_cross, shift_cross - content_cross)
+
+        # The divider repeats between every item, its text is read once
+        div = self.div
+        div.refresh()
+        div_lines = div.lines()
+        buffer, origin, clip = view.buffer, view.origin, view.clip
+
+        for entry, start, length, cross_length in entries:
+            for copy in along_copies:
+                pos_along = start + shift_along + copy
+                if pos_along >= content_along or pos_along + length <= 0:
+                    continue
+                for pos_cross in cross_positions:
+                    if pos_cross >= content_cross or pos_cross + cross_length <= 0:
+                        continue
+                    pos = [pos_cross, pos_along] if along else [pos_along, pos_cross]
+                    if entry is div and cross_length <= content_cross:
+                        buffer.blit_lines(div_lines, [origin[0] + pos[0], origin[1] + pos[1]], clip)
+                    elif cross_length > content_cross:
+                        # Taller than a horizontal menu, cut to the menu rows
+                        entry.draw(view.view(pos, [length, content_cross]))
+                    else:
+                        entry.draw(view, pos)
+
+    def render_window(self, size):
+        """Visible part of the menu. Only the items intersecting the view
+        are converted to string.
+
+        Parameters:
+            size (list): List of int [width, height] View size
+
+        Returns:
+            FrameBuffer: Same content as the full render cropped to size
+        """
+
+        horizontal = self.orient == HORIZONTAL
+        along = 0 if horizontal else 1
+        size_index = self.size_index()
+        loop = self.is_looping(size)
+        loop_div = self.loop_div
+        cross_length = self.cross_length(size)
+
+        length = size_index.total
+        if loop and len(loop_div._txt) > 0:
+            loop_size = loop_div.size
+            length += loop_size[along]
+            if not horizontal:
+                cross_length = max(cross_length, loop_size[0])
+
+        view = min(size[along], length)
+        strip = FrameBuffer([view, cross_length] if horizontal else [cross_length, view])
+        rendered = {}
+        for pos in range(view):
+            src = pos + self.offset[along]
+            if self.loop:
+                src %= length
+            elif src < 0 or src >= length:
+                continue
+            # Position past the items is the loop divider
+            index = size_index.find(src)
+            if index not in rendered:
+                entry = self.entry(index) if index < len(size_index) else loop_div
+                rendered[index] = entry.frame()
+            entry = rendered[index]
+            line = src - size_index.start(index)
+            if horizontal:
+                for row in range(min(cross_length, entry.height)):
+                    strip.rows[row][pos] = entry.rows[row][line]
+            else:
+                row = entry.rows[line][:cross_length]
+                strip.rows[pos][:len(row)] = row
 
+        # Offset across the orientation axis wraps around the content
+        if horizontal:
+            strip = strip.crop([0, self.offset[1]], strip.size, loop=self.loop)
+        else:
+            strip = strip.crop([self.offset[0], 0], strip.size, loop=self.loop)
+        return strip.crop([0, 0], size)
 
     @property
     def div(self):
-        if isinstance(self._div, Box):
-            self._div.parent = self
-            return self._div
-        else:
-            div = Label(self._div)
-            div.parent = self
-            return div
+        self._div.parent = self
+        return self._div
+
+    @div.setter
+    def div(self, div):
+        # Text dividers get one Label shared by the whole menu
+        if not isinstance(div, Box):
+            div = Label(sys.intern(str(div)), parent=self)
+        self._div = div
+        self._size_index = None
+        self.invalidate()
 
     @property
     def loop_div(self):
-        if isinstance(self._loop_div, Box):
-            self._loop_div.parent = self
-            return self._loop_div
-        else:
-            div = Label(self._loop_div)
-            div.parent = self
-            return div
+        self._loop_div.parent = self
+        return self._loop_div
+
+    @loop_div.setter
+    def loop_div(self, loop_div):
+        if not isinstance(loop_div, Box):
+            loop_div = Label(sys.intern(str(loop_div)), parent=self)
+        self._loop_div = loop_div
+        self.invalidate()
 
     def item_size_request(self, item):
         item_size = string_size(str(item._txt))
@@ -549,51 +2747,34 @@ class ItemsMenu(Items, Box, ActionReady):
         return '\n'.join(ordered_strings)
 
     def update_offset(self):
-        offset = [0, self.index]
-        #print(offset)
-        loop = ItemsMenu.needs_loop(self.items, self.size, self.orient, self.loop, self.div)
-        items = ItemsMenu._items_insert_divs(self.items, self.div, self.loop_div, loop)
-        index = items.index(self.selected_item())
+        size_index = self.size_index()
         axis = ItemsMenu.axis(self.orient)
 
         # Offset at selected item position
-        offset = [0,0]
-        for i in range(index):
-            item = self.items[i]
-            if i < index:
-                offset = [offset[0]+item.size[0], offset[1]+item.size[1]]
-        self.offset = prod_iters(axis, offset)
+        start = size_index.start(self.entry_index(self.index))
+        self.offset = prod_iters(axis, [start, start])
 
         # Check if empty space at the end and get back a little
         if not self.loop:
-            self_size = prod_iters(axis, self.size)
-            self_length = sum(self_size)
-
-            items_sizes = [i.size for i in items]
-            items_sizes_sum = [sum(i) for i in zip(*items_sizes)]
-            items_length = sum(prod_iters(axis, items_sizes_sum))
-
-            item_size = prod_iters(axis, self.selected_item().size)
-            item_length = sum(item_size)
-            remain = items_length - (sum(self.offset))
+            self_length = sum(prod_iters(axis, self.size))
+            items_length = size_index.total
+            remain = items_length - start
 
             if remain < self_length:
                 if items_length >= self_length:
                     self.offset = [axis[0]*(items_length-self_length), axis[1]*(items_length-self_length)]
 
 
-        print(self.offset)
-
-
 class ItemsChoice(Items, Box, ActionReady):
 
+    __slots__ = ('_items', '_index', '_actions', '_action_index')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
 
-    def __str__(self):
+    def refresh(self):
         self.txt = str(self.selected_item())
-        return self.txt
 
 
 
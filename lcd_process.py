@@ -0,0 +1,304 @@
+"""Display driver running in its own process.
+
+The App renders frames as usual, but a SharedFrame stands in for the
+Display: each frame is copied into a memory mapped file instead of being
+written to the LCD. A RenderProcess maps the same file, and diffs and
+writes the frames to the LCD at a steady rate, whatever the main
+interpreter is busy with. Frames are never pickled.
+
+    process = RenderProcess(Adafruit_CharLCD.Adafruit_CharLCDPlate, [16, 2])
+    process.start()
+    scheduler = FrameScheduler(app, process.shared, fps=20)
+    scheduler.start()
+
+The buffer starts with a sequence counter. The writer makes it odd while
+copying a frame and even once done, so the reader retries a frame read
+during a copy and skips the frames it has already drawn.
+
+Glyphs are sent to the render process when it starts, glyphs registered
+later show their fallback character.
+"""
+
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import time
+
+from lcd_charset import Charset
+from lcd_display import Display
+from lcd_glyph import Glyphs, registry
+from lcd_menu import FrameBuffer
+
+
+# Sequence counter, width, height, stop flag
+HEADER = struct.Struct('<IHHB3x')
+# Sequence counter alone, rewritten without touching the rest
+SEQUENCE = struct.Struct('<I')
+# Offset of the stop flag
+STOP = 8
+# Bytes of a character, utf-32
+CHAR_SIZE = 4
+# Tries to read a frame while the writer is copying it
+READ_RETRIES = 100
+# Directory of the shared files, in memory when available
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+class SharedFrame():
+    """Frame buffer in a memory mapped file, shared by two processes.
+    Has the update method of a Display so a FrameScheduler can write to it.
+    """
+
+    def __init__(self, size=None, path=None):
+        """
+        Parameters:
+            size (list): List of int [width, height]. Creates the file when
+                given, maps an existing one otherwise.
+            path (str): Shared file. A new temporary file if None
+        """
+
+        self.owner = size is not None
+        if self.owner:
+            if path is None:
+                fd, path = tempfile.mkstemp(prefix='lcd-frame-', dir=SHM_DIR)
+            else:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+            length = HEADER.size + size[0] * size[1] * CHAR_SIZE
+            os.ftruncate(fd, length)
+        else:
+            fd = os.open(path, os.O_RDWR)
+            length = os.fstat(fd).st_size
+        try:
+            self._map = mmap.mmap(fd, length)
+        finally:
+            os.close(fd)
+        self.path = path
+        if self.owner:
+            HEADER.pack_into(self._map, 0, 0, size[0], size[1], 0)
+        self._size = list(HEADER.unpack_from(self._map, 0)[1:3])
+        if self.owner:
+            self.write(FrameBuffer(size))
+        # Stats
+        self.retries = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def sequence(self):
+        """Number of frames written so far, times 2. Odd while a frame is
+        being written."""
+
+        return SEQUENCE.unpack_from(self._map, 0)[0]
+
+    @property
+    def stopped(self):
+        return bool(HEADER.unpack_from(self._map, 0)[3])
+
+    def stop(self, stop=True):
+        """Ask the reading process to end"""
+
+        self._map[STOP] = int(stop)
+
+    def write(self, frame):
+        """Copy a frame into the buffer
+
+        Parameters:
+            frame (FrameBuffer or str): Content, cropped or padded to size
+        """
+
+        if not isinstance(frame, FrameBuffer):
+            frame = FrameBuffer.from_string(str(frame))
+        if frame.size != self._size:
+            frame = frame.crop([0, 0], self._size)
+        data = ''.join(''.join(row) for row in frame.rows).encode('utf-32-le')
+        seq = SEQUENCE.unpack_from(self._map, 0)[0]
+        SEQUENCE.pack_into(self._map, 0, (seq + 1) & 0xFFFFFFFF)
+        self._map[HEADER.size:HEADER.size + len(data)] = data
+        SEQUENCE.pack_into(self._map, 0, (seq + 2) & 0xFFFFFFFF)
+
+    def update(self, frame):
+        """Publish a frame, like Display.update
+
+        Returns:
+            int: Number of commands sent, always 0 as the render process
+                writes to the LCD
+        """
+
+        self.write(frame)
+        return 0
+
+    # Publish the current frame of an App, like Display.show
+    show = Display.show
+
+    def read(self, last=None):
+        """Latest complete frame
+
+        Parameters:
+            last (int): Sequence of the frame read before
+
+        Returns:
+            list: [sequence, FrameBuffer]. FrameBuffer is None if the
+                sequence is still last, or if the writer kept copying
+                frames during every try
+        """
+
+        width, height = self._size
+        end = HEADER.size + width * height * CHAR_SIZE
+        for _ in range(READ_RETRIES):
+            seq = SEQUENCE.unpack_from(self._map, 0)[0]
+            if seq == last:
+                return [seq, None]
+            if seq & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            data = self._map[HEADER.size:end]
+            if SEQUENCE.unpack_from(self._map, 0)[0] != seq:
+                self.retries += 1
+                continue
+            chars = data.decode('utf-32-le')
+            frame = FrameBuffer([width, height])
+            # Rows of the buffer replaced, like FrameBuffer.from_string
+            frame.rows = [list(chars[y * width:(y + 1) * width]) for y in range(height)]
+            return [seq, frame]
+        return [last, None]
+
+    def close(self, remove=None):
+        """Unmap the buffer, the creating side removes the file
+
+        Parameters:
+            remove (bool): Remove the file. True for the creating side if None
+        """
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if remove if remove is not None else self.owner:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def glyph_table(glyphs=None):
+    """Glyph definitions in registration order, to register them again in
+    another process with the same characters
+
+    Returns:
+        list: list of [name, bitmap, fallback]
+    """
+
+    glyphs = glyphs if glyphs is not None else registry
+    table = []
+    for name in glyphs.names():
+        char = glyphs[name]
+        table.append([name, list(glyphs.bitmap(char)), glyphs.fallback(char)])
+    return table
+
+
+def render_loop(path, lcd_factory, fps=20, cursor_cost=1, glyphs=None, rom='A00',
+                substitutes=None):
+    """Body of the render process. Draws the frames of a SharedFrame until
+    it is stopped.
+
+    Parameters:
+        path (str): Shared file
+        lcd_factory (function): Creates the Adafruit_CharLCD compatible
+            object, called in the render process
+        fps (float): Frames checked per second
+        cursor_cost (int): See Display
+        glyphs (list): Glyph table, see glyph_table
+        rom (str): Character ROM of the display, see lcd_charset.Charset
+        substitutes (dict): char: glyph name, see lcd_charset.Charset
+    """
+
+    registered = Glyphs()
+    for name, bitmap, fallback in glyphs or []:
+        registered.register(name, bitmap, fallback)
+    shared = SharedFrame(path=path)
+    encoding = Charset(rom, substitutes, glyphs=registered) if rom is not None else None
+    display = Display(lcd_factory(), cursor_cost=cursor_cost, glyphs=registered,
+                      charset=encoding)
+    period = 1.0 / fps
+    last = None
+    tick = time.monotonic()
+    try:
+        while not shared.stopped:
+            last, frame = shared.read(last)
+            if frame is not None:
+                display.update(frame)
+            # Steady rate, late ticks are not caught up
+            tick = max(tick + period, time.monotonic())
+            time.sleep(max(0.0, tick - time.monotonic()))
+    finally:
+        shared.close()
+
+
+class RenderProcess():
+    """Process writing the frames of a SharedFrame to an LCD.
+
+    Buttons read through the LCD object must use their own connection,
+    the one of the render process belongs to it.
+    """
+
+    def __init__(self, lcd_factory, size, fps=20, cursor_cost=1, glyphs=None, path=None,
+                 rom='A00', substitutes=None):
+        """
+        Parameters:
+            lcd_factory (function): Creates the LCD object in the render
+                process. Must be picklable when processes are spawned, like
+                a class or a module level function.
+            size (list): List of int [width, height]
+            fps (float): Frames checked per second
+            cursor_cost (int): See Display
+            glyphs (Glyphs): Glyph registry. lcd_glyph.registry if None
+            path (str): Shared file. A new temporary file if None
+            rom (str): Character ROM of the display, see lcd_charset.Charset
+            substitutes (dict): char: glyph name, see lcd_charset.Charset
+        """
+
+        self.lcd_factory = lcd_factory
+        self.fps = fps
+        self.cursor_cost = cursor_cost
+        self.glyphs = glyphs
+        self.rom = rom
+        self.substitutes = substitutes
+        self.shared = SharedFrame(size, path)
+        self._process = None
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.shared.stop(False)
+        self._process = multiprocessing.Process(
+            target=render_loop, name='lcd-render',
+            args=(self.shared.path, self.lcd_factory, self.fps, self.cursor_cost,
+                  glyph_table(self.glyphs), self.rom, self.substitutes))
+        self._process.daemon = True
+        self._process.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the render process, killed if it does not end in time"""
+
+        if self._process is None:
+            return
+        self.shared.stop()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._process = None
+
+    def close(self):
+        """Stop the render process and remove the shared file"""
+
+        self.stop()
+        self.shared.close()
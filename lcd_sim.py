@@ -0,0 +1,298 @@
+"""In-process stand-in for an HD44780 behind an MCP23017 (Adafruit LCD plate).
+
+Offers the Adafruit_CharLCD surface used by the library and keeps track of
+what a real plate would cost: commands, data bytes, I2C transactions and
+bus time.
+"""
+
+# Commands
+LCD_CLEARDISPLAY = 0x01
+LCD_RETURNHOME = 0x02
+LCD_ENTRYMODESET = 0x04
+LCD_DISPLAYCONTROL = 0x08
+LCD_CURSORSHIFT = 0x10
+LCD_FUNCTIONSET = 0x20
+LCD_SETCGRAMADDR = 0x40
+LCD_SETDDRAMADDR = 0x80
+
+# Flags
+LCD_ENTRYLEFT = 0x02
+LCD_DISPLAYON = 0x04
+LCD_CURSORON = 0x02
+LCD_BLINKON = 0x01
+
+LCD_ROW_OFFSETS = (0x00, 0x40, 0x14, 0x54)
+
+DDRAM_SIZE = 0x80
+CGRAM_SIZE = 0x40
+
+# Execution time of a command inside the controller, in seconds
+EXEC_TIME = 37e-6
+EXEC_TIME_LONG = 1.52e-3
+
+
+class SimulatedLCD():
+
+    def __init__(self, cols=16, lines=2, i2c_hz=100000, write_delay=1e-3,
+                 transactions_per_write=9, transaction_bytes=4):
+        """
+        Parameters:
+            cols (int): Display width in characters
+            lines (int): Display height in characters
+            i2c_hz (int): Bus clock
+            write_delay (float): Sleep done by the driver before each write8
+            transactions_per_write (int): I2C transactions of one write8.
+                The plate sets RS, then sends each nibble followed by an
+                enable pulse of three port writes.
+            transaction_bytes (int): Bytes of one port write transaction
+        """
+
+        self._cols = cols
+        self._lines = lines
+        self.i2c_hz = i2c_hz
+        self.write_delay = write_delay
+        self.transactions_per_write = transactions_per_write
+        self.transaction_bytes = transaction_bytes
+        self.pressed = set()
+        self.reset()
+
+    def reset(self):
+        self.ddram = [0x20] * DDRAM_SIZE
+        self.cgram = [0] * CGRAM_SIZE
+        self.address = 0
+        self.cgram_mode = False
+        self.increment = True
+        self.displaycontrol = LCD_DISPLAYON
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.commands = 0
+        self.data = 0
+        self.transactions = 0
+        self.bus_bytes = 0
+        self.bus_time = 0.0
+
+    def counters(self):
+        """
+        Returns:
+            dict: commands, data, transactions, bus_bytes and bus_time
+        """
+
+        return {'commands': self.commands,
+                'data': self.data,
+                'transactions': self.transactions,
+                'bus_bytes': self.bus_bytes,
+                'bus_time': self.bus_time}
+
+    def lines(self):
+        """Visible characters, one str per row
+
+        Returns:
+            list: list of str
+        """
+
+        rows = []
+        for row in range(self._lines):
+            start = LCD_ROW_OFFSETS[row]
+            rows.append(''.join(chr(c) for c in self.ddram[start:start + self._cols]))
+        return rows
+
+    def __str__(self):
+        return '\n'.join(self.lines())
+
+    ###########################################################################
+    # Bus
+    ###########################################################################
+
+    def bus_cost(self, transactions, exec_time=EXEC_TIME):
+        self.transactions += transactions
+        self.bus_bytes += transactions * self.transaction_bytes
+        # 9 clocks per byte plus start and stop conditions
+        clocks = transactions * (self.transaction_bytes * 9 + 2)
+        self.bus_time += float(clocks) / self.i2c_hz + exec_time
+
+    def write8(self, value, char_mode=False):
+        self.bus_time += self.write_delay
+        if char_mode:
+            self.data += 1
+            self._write_data(value)
+            self.bus_cost(self.transactions_per_write)
+        else:
+            self.commands += 1
+            exec_time = self._command(value)
+            self.bus_cost(self.transactions_per_write, exec_time)
+
+    def _write_data(self, value):
+        step = 1 if self.increment else -1
+        if self.cgram_mode:
+            self.cgram[self.address % CGRAM_SIZE] = value & 0x1F
+            self.address = (self.address + step) % CGRAM_SIZE
+        else:
+            self.ddram[self.address % DDRAM_SIZE] = value & 0xFF
+            self.address = (self.address + step) % DDRAM_SIZE
+
+    def _command(self, value):
+        if value & LCD_SETDDRAMADDR:
+            self.address = value & 0x7F
+            self.cgram_mode = False
+        elif value & LCD_SETCGRAMADDR:
+            self.address = value & 0x3F
+            self.cgram_mode = True
+        elif value & LCD_FUNCTIONSET or value & LCD_CURSORSHIFT:
+            pass
+        elif value & LCD_DISPLAYCONTROL:
+            self.displaycontrol = value & 0x07
+        elif value & LCD_ENTRYMODESET:
+            self.increment = bool(value & LCD_ENTRYLEFT)
+        elif value & LCD_RETURNHOME:
+            self.address = 0
+            self.cgram_mode = False
+            return EXEC_TIME_LONG
+        elif value & LCD_CLEARDISPLAY:
+            self.ddram = [0x20] * DDRAM_SIZE
+            self.address = 0
+            self.cgram_mode = False
+            self.increment = True
+            return EXEC_TIME_LONG
+        return EXEC_TIME
+
+    ###########################################################################
+    # Adafruit_CharLCD surface
+    ###########################################################################
+
+    def clear(self):
+        self.write8(LCD_CLEARDISPLAY)
+
+    def home(self):
+        self.write8(LCD_RETURNHOME)
+
+    def set_cursor(self, col, row):
+        if row > self._lines:
+            row = self._lines - 1
+        self.write8(LCD_SETDDRAMADDR | (col + LCD_ROW_OFFSETS[row]))
+
+    def enable_display(self, enable):
+        self._display_flag(LCD_DISPLAYON, enable)
+
+    def show_cursor(self, show):
+        self._display_flag(LCD_CURSORON, show)
+
+    def blink(self, blink):
+        self._display_flag(LCD_BLINKON, blink)
+
+    def _display_flag(self, flag, enable):
+        if enable:
+            control = self.displaycontrol | flag
+        else:
+            control = self.displaycontrol & ~flag
+        self.write8(LCD_DISPLAYCONTROL | control)
+
+    def create_char(self, location, pattern):
+        location &= 0x7
+        self.write8(LCD_SETCGRAMADDR | (location << 3))
+        for i in range(8):
+            self.write8(pattern[i], char_mode=True)
+
+    def message(self, text):
+        line = 0
+        for char in text:
+            if char == '\n':
+                line += 1
+                self.set_cursor(0, line)
+            else:
+                self.write8(ord(char), True)
+
+    def is_pressed(self, button):
+        return button in self.pressed
+
+    def press(self, button):
+        self.pressed.add(button)
+
+    def release(self, button):
+        self.pressed.discard(button)
+
+
+class RecordingBus():
+    """Stand-in for the I2C device of the plate expander, an MCP23017.
+
+    Records every transfer and decodes the port B writes into the
+    commands and data of a SimulatedLCD, so what a bus writer sends can be
+    checked on the simulated screen.
+    """
+
+    # Registers, IOCON.BANK = 0
+    IOCON = 0x0A
+    OLATB = 0x15
+    SEQOP = 0x20
+    # Port B pins of the plate
+    PIN_RS = 0x80
+    PIN_EN = 0x20
+    DATA_PINS = (0x10, 0x08, 0x04, 0x02)
+
+    def __init__(self, lcd=None):
+        """
+        Parameters:
+            lcd (SimulatedLCD): Controller behind the expander. A new 16x2
+                one if None
+        """
+
+        self.lcd = lcd if lcd is not None else SimulatedLCD(write_delay=0)
+        self.registers = [0] * 0x16
+        # list of [register, list of int]
+        self.transfers = []
+        # First nibble of a byte, None when waiting for one
+        self._high = None
+
+    def reset_transfers(self):
+        self.transfers = []
+
+    @property
+    def bytes(self):
+        return sum(len(data) for _, data in self.transfers)
+
+    def bus_time(self, i2c_hz=100000):
+        """Time the recorded transfers take on the bus, in seconds"""
+
+        # Address and register bytes, 9 clocks per byte, start and stop
+        clocks = sum((len(data) + 2) * 9 + 2 for _, data in self.transfers)
+        return float(clocks) / i2c_hz
+
+    def readU8(self, register):
+        return self.registers[register]
+
+    def write8(self, register, value):
+        self.writeList(register, [value])
+
+    def writeList(self, register, data):
+        self.transfers.append([register, list(data)])
+        for value in data:
+            self._write_register(register, value & 0xFF)
+            if self.registers[self.IOCON] & self.SEQOP:
+                # Byte mode toggles between the registers of the A/B pair
+                register ^= 1
+            else:
+                register += 1
+
+    def _write_register(self, register, value):
+        previous = self.registers[register]
+        self.registers[register] = value
+        if register == self.OLATB and previous & self.PIN_EN and not value & self.PIN_EN:
+            self._latch(value)
+
+    def _latch(self, value):
+        # The controller reads the data pins when enable falls
+        nibble = 0
+        for bit, pin in enumerate(self.DATA_PINS):
+            if value & pin:
+                nibble |= 1 << bit
+        if self._high is None:
+            self._high = nibble
+            return
+        byte = (self._high << 4) | nibble
+        self._high = None
+        if value & self.PIN_RS:
+            self.lcd.data += 1
+            self.lcd._write_data(byte)
+        else:
+            self.lcd.commands += 1
+            self.lcd._command(byte)
@@ -0,0 +1,195 @@
+"""Timings and counters of the UI hot paths.
+
+Instrumentation is off until a Stats is given to the App:
+
+    app.stats = Stats(path='lcd_stats.jsonl')
+
+Events handled and frames drawn are then timed by phase:
+
+    handle  running the actions of a trigger
+    layout  resolving the sizes read by the render, when not stored yet
+    render  rendering the current screen, layout excluded
+    bus     writing the changed cells to the display
+
+Each event or frame is a record, streamed to path as one JSON line when a
+path is given. Counters count renders, frame cache hits and display
+commands. Only the last samples of each phase are kept for percentiles.
+"""
+
+import collections
+import json
+import threading
+import time
+
+
+# Samples kept for the percentiles of each phase
+WINDOW = 512
+PERCENTILES = (50, 90, 99)
+
+
+class Stats():
+
+    def __init__(self, window=WINDOW, path=None):
+        """
+        Parameters:
+            window (int): Samples kept per phase
+            path (str): File records are appended to, one JSON line each.
+                Not streamed if None
+        """
+
+        self.window = window
+        self.counters = collections.Counter()
+        # name: deque of seconds, most recent last
+        self._samples = {}
+        self._lock = threading.Lock()
+        # Record open in each thread, see record
+        self._local = threading.local()
+        self._stream = None
+        if path is not None:
+            self.stream(path)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def add(self, name, seconds):
+        """Add a timing sample"""
+
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = collections.deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def phase(self, name, seconds):
+        """Add a timing sample to its phase and to the record open in this
+        thread, if any"""
+
+        self.add(name, seconds)
+        phases = getattr(self._local, 'phases', None)
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    def record(self, kind):
+        """Context manager gathering the phases of one event or frame.
+        Records opened inside another record of the same thread are part
+        of it.
+
+        Parameters:
+            kind (str): 'event' or 'frame'
+        """
+
+        return _Record(self, kind)
+
+    def _close(self, kind, start, phases, counts):
+        total = time.perf_counter() - start
+        self.add(kind, total)
+        self.count(kind + 's')
+        stream = self._stream
+        if stream is not None:
+            line = json.dumps({'kind': kind,
+                               'time': time.time(),
+                               'total': total,
+                               'phases': phases,
+                               'counts': counts}, separators=(',', ':'))
+            with self._lock:
+                if self._stream is not None:
+                    self._stream.write(line + '\n')
+
+    def percentiles(self, name, percentiles=PERCENTILES):
+        """
+        Parameters:
+            name (str): Phase or record kind
+            percentiles (tuple): Percentiles to compute, 0 to 100
+
+        Returns:
+            dict: percentile: seconds. Empty if there is no sample
+        """
+
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return {}
+        last = len(samples) - 1
+        return {p: samples[min(last, int(round(p / 100.0 * last)))] for p in percentiles}
+
+    def summary(self):
+        """
+        Returns:
+            dict: {'counters': {name: int},
+                   'timings': {name: {'count': int, 'mean': float, 'max': float,
+                                      'p50': float, ...}}}
+        """
+
+        with self._lock:
+            counters = dict(self.counters)
+            names = list(self._samples)
+        timings = {}
+        for name in names:
+            with self._lock:
+                samples = list(self._samples[name])
+            if not samples:
+                continue
+            timing = {'count': len(samples),
+                      'mean': sum(samples) / len(samples),
+                      'max': max(samples)}
+            for p, seconds in self.percentiles(name).items():
+                timing['p{0}'.format(p)] = seconds
+            timings[name] = timing
+        return {'counters': counters, 'timings': timings}
+
+    def dump(self, path):
+        """Write the summary to a JSON file"""
+
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=1, sort_keys=True)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self._samples.clear()
+
+    def stream(self, path):
+        """Append records to a file from now on"""
+
+        self.close()
+        with self._lock:
+            self._stream = open(path, 'a', buffering=1)
+
+    def close(self):
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+
+class _Record():
+
+    __slots__ = ('stats', 'kind', 'outer', 'start', 'counts')
+
+    def __init__(self, stats, kind):
+        self.stats = stats
+        self.kind = kind
+        self.outer = False
+
+    def __enter__(self):
+        local = self.stats._local
+        if getattr(local, 'phases', None) is None:
+            self.outer = True
+            local.phases = {}
+            self.start = time.perf_counter()
+            # Counters at the start, to report what the record added
+            with self.stats._lock:
+                self.counts = dict(self.stats.counters)
+        return self
+
+    def __exit__(self, *exc):
+        if self.outer:
+            stats = self.stats
+            phases = stats._local.phases
+            stats._local.phases = None
+            with stats._lock:
+                counts = {name: n - self.counts.get(name, 0)
+                          for name, n in stats.counters.items() if n != self.counts.get(name, 0)}
+            stats._close(self.kind, self.start, phases, counts)
+        return False
@@ -3,6 +3,9 @@ import math
 import Adafruit_CharLCD as Lcd
 from lcd_menu import PushButton, Box, Action, App, Label, ItemsMenu, ItemsChoice
 import lcd_menu
+from lcd_display import Display, FrameScheduler
+from lcd_input import Button, Input
+from lcd_glyph import glyph
 
 
 BUTTONS = {'UP': 3,
@@ -14,56 +17,6 @@ BUTTONS = {'UP': 3,
 LCD_SIZE = [16, 2]
 
 
-class Button(object):
-
-    def __init__(self, name, id, continuous=False,
-                 check_fct=None, check_args=(), check_kwargs={}):
-        self.name = name
-        self.id = id
-        self.continuous = continuous
-        self.last_value = False
-        # Check
-        self.check_fct = check_fct
-        self.check_args = check_args
-        self.check_kwargs = check_kwargs
-
-    def __repr__(self):
-        return '<Button> {0}'.format(self.name)
-
-    @property
-    def value(self):
-        if self.check_fct:
-            old_last = self.last_value
-            # custom check
-            value = self.check_fct(*self.check_args, **self.check_kwargs)
-            self.last_value = value
-            # true or
-            if value:
-                return not old_last or self.continuous
-        self.last_value = False
-        return
-
-def lcd_fast_message(lcd, string, string_prev=''):
-    # only update what has changed
-    # much faster for small changes
-    
-    rows = string.split('\n')
-    rows_prev = string_prev.split('\n')
-
-    for y in range(lcd._lines):
-        for x in range(lcd._cols):
-            try:
-                char = rows[y][x]
-            except:
-                char = ' '
-            try:
-                char_prev = rows_prev[y][x]
-            except:
-                char_prev = ' '
-            if char != char_prev:
-                lcd.set_cursor(x, y)
-                lcd.write8(ord(char), True)
-
 def lcd_cursor(lcd, pos):
     if pos:
         lcd.blink(True)
@@ -87,11 +40,11 @@ def from_to(txt, f, t):
 
 def below_fct(app, menu, *args, **kwargs):
     from_to('Go Below', menu, menu.below)
-    app.menu = menu.below
+    app.go_below(menu.below)
 
 def above_fct(app, menu, *args, **kwargs):
     from_to('Go Above', menu, menu.above)
-    app.menu = menu.above
+    app.go_above(menu.above)
 
 def next_fct(menu, *args, **kwargs):
     before = str(menu.selected_item())
@@ -112,6 +65,7 @@ def trigger_item_fct(menu, trigger, *args, **kwargs):
 # LCD
 lcd = Lcd.Adafruit_CharLCDPlate()
 lcd.blink(True)
+display = Display(lcd)
 
 app = App()
 
@@ -168,11 +122,12 @@ sauce = PushButton('sau\nsag', parent=home)
 colors = ItemsChoice(parent=main, align=[0,0], orient=0, actions=[hori_next, hori_prev])
 
 # Colors
-red = PushButton('   Red ->', parent=colors, above=colors)
-green = PushButton('<- Green ->', parent=colors, above=colors)
-blue = PushButton('<- Blue ->', parent=colors, above=colors)
-yellow = PushButton('<- Yellow ->', parent=colors, above=colors)
-orange = PushButton('<- Orange   ', parent=colors, above=colors)
+left, right = glyph('left'), glyph('right')
+red = PushButton('  Red ' + right, parent=colors, above=colors)
+green = PushButton(left + ' Green ' + right, parent=colors, above=colors)
+blue = PushButton(left + ' Blue ' + right, parent=colors, above=colors)
+yellow = PushButton(left + ' Yellow ' + right, parent=colors, above=colors)
+orange = PushButton(left + ' Orange  ', parent=colors, above=colors)
 
 # Linking
 welcome.below = home
@@ -184,23 +139,20 @@ app.menu = welcome
 pprint(welcome)
 pprint(home)
 pprint(app.menu)
-lcd_fast_message(lcd, str(welcome), string_prev=' ')
+scheduler = FrameScheduler(app, display, fps=20)
+scheduler.start()
+
+inputs = Input(btns, rate=50)
+inputs.start()
 
 while True:
-    for btn in btns:
-        if btn.value:
-            old_lcd_fast_message = str(app.menu)
-            print(btn.name)
-            print(app.menu)
-            app.menu.check_do(btn.id)
-            #app.menu = app.focus
-
-            lcd_fast_message(lcd, str(app.menu), string_prev=old_lcd_fast_message)
-            print(app.menu.selected_item().cursor_pos)
-            #pprint(str(app))
-            #pprint(app.cursor_display())
-            #pprint(app.content())
-            #pprint(app.selected_pos())
-            #pprint(app.cursor_display())
-
-            #lcd_cursor(lcd, app.menu.cursor())
+    btn = app.process(inputs.events)
+    print(btn.name)
+    print(app.menu.selected_item().cursor_pos)
+    #pprint(str(app))
+    #pprint(app.cursor_display())
+    #pprint(app.content())
+    #pprint(app.selected_pos())
+    #pprint(app.cursor_display())
+
+    #lcd_cursor(lcd, app.menu.cursor())
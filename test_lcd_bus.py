@@ -0,0 +1,77 @@
+"""Batched plate writes checked against the per-pin driver path.
+
+Run:
+    python -m pytest test_lcd_bus.py
+"""
+
+import random
+
+from lcd_bus import MAX_TRANSFER, OLATA, OLATB, BatchedPlate
+from lcd_display import Display
+from lcd_glyph import glyph
+from lcd_menu import FrameBuffer
+from lcd_sim import RecordingBus, SimulatedLCD
+
+
+def random_frame(rng, size):
+    chars = 'abc  ' + glyph('left') + glyph('right') + glyph('check')
+    rows = [''.join(rng.choice(chars) for _ in range(size[0])) for _ in range(size[1])]
+    return FrameBuffer.from_string('\n'.join(rows))
+
+
+def displays(size):
+    """Display on a batched plate over a recording bus, and the same
+    display on a SimulatedLCD written character by character"""
+
+    bus = RecordingBus(SimulatedLCD(size[0], size[1], write_delay=0))
+    # Backlight off, buttons pulled up
+    bus.registers[OLATA] = 0xDF
+    bus.registers[OLATB] = 0x01
+    batched = Display(BatchedPlate(bus, size[0], size[1]))
+    reference = SimulatedLCD(size[0], size[1], write_delay=0)
+    return bus, batched, reference, Display(reference)
+
+
+def test_same_content_as_reference():
+    rng = random.Random(1)
+    for size in ([16, 2], [20, 4]):
+        bus, batched, reference, direct = displays(size)
+        for _ in range(200):
+            frame = random_frame(rng, size)
+            batched.update(frame)
+            direct.update(frame)
+            assert bus.lcd.ddram == reference.ddram
+            assert bus.lcd.cgram == reference.cgram
+
+
+def test_transfers_within_block_size():
+    rng = random.Random(2)
+    bus, batched, _, _ = displays([20, 4])
+    for _ in range(20):
+        batched.update(random_frame(rng, [20, 4]))
+    assert bus.transfers
+    assert all(len(data) <= MAX_TRANSFER for _, data in bus.transfers)
+    assert all(register == OLATB for register, _ in bus.transfers[1:])
+
+
+def test_fewer_bytes_than_reference():
+    rng = random.Random(3)
+    bus, batched, reference, direct = displays([16, 2])
+    bus.reset_transfers()
+    reference.reset_counters()
+    for _ in range(20):
+        frame = random_frame(rng, [16, 2])
+        batched.update(frame)
+        direct.update(frame)
+    assert bus.bytes < reference.bus_bytes
+
+
+def test_color_kept_by_frames():
+    rng = random.Random(4)
+    bus, batched, _, _ = displays([16, 2])
+    batched.lcd.set_color(True, False, True)
+    for _ in range(5):
+        batched.update(random_frame(rng, [16, 2]))
+    # Red lit, green off, blue lit: pins low when lit
+    assert bus.registers[OLATA] & 0xC0 == 0x80
+    assert bus.registers[OLATB] & 0x01 == 0
@@ -0,0 +1,189 @@
+"""Rendering, caching and invalidation of the widgets.
+
+Run:
+    python -m pytest test_lcd_menu.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from lcd_loader import Screens
+from lcd_menu import (HORIZONTAL, VERTICAL, Action, App, ItemProvider, ItemsChoice, ItemsMenu, Label, Marquee,
+                      PushButton, string_align_move)
+
+
+def aligned(txt, size, align):
+    return string_align_move(txt, size, [0, 0], align, False)
+
+
+@pytest.mark.parametrize('align', [[0, 0], [1, 1], [2, 2]])
+def test_button_matches_string_align_move(align):
+    button = PushButton('ok\nyes', size=[6, 3], auto_size=False, align=align)
+    assert str(button) == aligned('ok\nyes', [6, 3], align)
+
+
+def test_menu_matches_string_align_move():
+    buttons = [PushButton(txt, size=[4, 1], auto_size=False, align=[2, 0]) for txt in ('a', 'bc')]
+    menu = ItemsMenu(buttons, size=[12, 1], auto_size=False, orient=HORIZONTAL, div='|')
+    assert str(menu) == aligned('a', [4, 1], [2, 0]) + '|' + aligned('bc', [4, 1], [2, 0])
+
+
+def test_vertical_menu_after_child_text_change():
+    buttons = [PushButton(txt, size=[4, 1], auto_size=False, align=[1, 0]) for txt in ('a', 'bc')]
+    label = Label('de', size=[4, 1], auto_size=False, align=[0, 0])
+    menu = ItemsMenu(buttons + [label], size=[4, 3], auto_size=False, orient=VERTICAL)
+    str(menu)
+    buttons[1].label.txt = 'xyz'
+    label.txt = 'f'
+    assert str(menu) == '\n'.join([aligned('a', [4, 1], [1, 0]), aligned('xyz', [4, 1], [1, 0]),
+                                   aligned('f', [4, 1], [0, 0])])
+
+
+def test_choice_matches_string_align_move():
+    choice = ItemsChoice([Label('red'), Label('green')], size=[8, 1], auto_size=False)
+    assert str(choice) == aligned('red', [8, 1], choice.align)
+    choice.next()
+    assert str(choice) == aligned('green', [8, 1], choice.align)
+
+
+def test_app_frame_after_choice_item_change():
+    items = [Label('red'), Label('green')]
+    choice = ItemsChoice(items, size=[8, 1], auto_size=False)
+    app = App(choice)
+    app.frame()
+    items[0].txt = 'blue'
+    assert str(app.frame()) == aligned('blue', [8, 1], choice.align)
+    choice.next()
+    items[1].txt = 'teal'
+    assert str(choice) == aligned('teal', [8, 1], choice.align)
+    assert str(app.frame()) == aligned('teal', [8, 1], choice.align)
+
+
+def test_app_frame_of_nested_menu():
+    label = Label('cd')
+    inner = ItemsMenu([Label('ab'), label], orient=HORIZONTAL, div='|')
+    app = App(ItemsMenu([inner, Label('ef')], size=[6, 2], auto_size=False, orient=VERTICAL))
+    assert str(app.frame()).split('\n')[0].startswith('ab|cd')
+    label.txt = 'CDE'
+    assert str(app.frame()).split('\n')[0].startswith('ab|CDE')
+
+
+def test_button_measured_after_label_change():
+    button = PushButton('bb')
+    menu = ItemsMenu([button, Label('cc')], size=[10, 1], auto_size=False, orient=HORIZONTAL)
+    assert str(menu) == 'bbcc'
+    button.label.txt = 'BBBBB'
+    assert str(menu) == 'BBBBBcc'
+    # Cached render is the new one
+    assert str(menu) == 'BBBBBcc'
+
+
+def test_button_label_gets_more_lines():
+    def menu_of(button):
+        return ItemsMenu([button, Label('cc')], size=[4, 3], auto_size=False, orient=VERTICAL)
+
+    button = PushButton('bb')
+    menu = menu_of(button)
+    str(menu)
+    button.label.txt = 'B\nB'
+    assert str(menu) == str(menu_of(PushButton('B\nB')))
+    assert len(str(menu).split('\n')) == 3
+
+
+def test_app_frame_after_label_change():
+    button = PushButton('bb')
+    app = App(ItemsMenu([button, Label('cc')], size=[10, 1], auto_size=False, orient=HORIZONTAL))
+    app.frame()
+    button.label.txt = 'BBBBB'
+    assert str(app.frame()).startswith('BBBBBcc')
+    assert str(app.frame()).startswith('BBBBBcc')
+
+
+def test_app_frame_of_choice_screen():
+    choice = ItemsChoice([Label('red'), Label('green')], size=[8, 1], auto_size=False)
+    app = App(choice)
+    assert str(app.frame()) == '  red   '
+    choice.next()
+    assert str(app.frame()) == '  green '
+
+
+def test_app_frame_of_button_screen():
+    button = PushButton('x')
+    app = App(button)
+    assert str(app.frame()) == 'x'
+    button.label.txt = 'yy'
+    assert str(app.frame()) == 'yy'
+
+
+def test_compiled_choice_screen():
+    definition = {'start': 'colors',
+                  'screens': {'colors': {'type': 'ItemsChoice', 'size': [8, 1], 'auto_size': False,
+                                         'items': [{'type': 'Label', 'txt': 'red'},
+                                                   {'type': 'Label', 'txt': 'green'}]}}}
+    screens = Screens(definition)
+    assert screens.definition['screens']['colors']['render'] == [[8, 1], '  red   ']
+    app = App('colors', screens=screens)
+    assert str(app.frame()) == '  red   '
+
+
+def test_marquee_scrolls_at_two_size_classes():
+    label = Label('hello world!', size=[4, 1], auto_size=False)
+    label.marquee = Marquee(speed=1, pause=0)
+    app = App(label)
+    start = label.marquee._start
+    shown = []
+    for second in range(3):
+        label.marquee.tick(start + second + 0.5)
+        frames = app.frames([None, [6, 1]])
+        shown.append([str(frames[None]), str(frames[(6, 1)])])
+    assert shown == [['hell', 'hello '], ['ello', 'ello w'], ['llo ', 'llo wo']]
+
+
+def test_prefetch_reports_errors_and_stops():
+    def get_item(index):
+        if index == 2:
+            raise ValueError(index)
+        return 'item %d' % index
+
+    def on_error(index, error):
+        failed.append(index)
+        reported.set()
+
+    failed = []
+    reported = threading.Event()
+    provider = ItemProvider(10, get_item)
+    provider.on_error = on_error
+    menu = ItemsMenu(provider, size=[8, 2], auto_size=False, orient=VERTICAL)
+    provider.prefetch(0, 3)
+    assert reported.wait(1)
+    assert failed == [2]
+    assert list(provider.errors) == [2]
+    # The thread survived the error
+    thread = provider._thread
+    provider.prefetch(5, 0)
+    deadline = time.monotonic() + 1
+    while 'item 5' not in [str(item).strip() for item in provider.materialized()]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    # Detached from the menu
+    menu.items = ['a']
+    thread.join(1)
+    assert not thread.is_alive()
+
+
+def test_actions_follow_replacement_and_priority():
+    ran = []
+    first = Action(lambda **kwargs: ran.append('first'), triggers=['ok'], stop=True)
+    second = Action(lambda **kwargs: ran.append('second'), triggers=['ok'], stop=True)
+    button = PushButton('b', actions=[first])
+    with pytest.raises(TypeError):
+        button.actions[0] = second
+    button.check_do('ok')
+    button.actions = [second]
+    button.check_do('ok')
+    button.actions = [first, second]
+    second.priority = 1
+    button.check_do('ok')
+    assert ran == ['first', 'second', 'second']